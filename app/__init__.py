@@ -1,33 +1,89 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from config import Config
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.utils.cache import ResponseCache
+from app.utils.request_log import RequestLogger
+from app.utils.hashing import PasswordHasher
+from app.utils.metrics import Metrics
+from app.utils.profiler import SQLProfiler
+from app.utils.auth_helpers import TokenAuth
+from app.utils.ratelimit import RateLimiter
+from app.utils.jobs import JobQueue
+from app.utils.pricing import PricingEngine
+from app.utils.idempotency import Idempotency
+from app.utils.database import RoutingSession, configure_engines, install_sqlite_pragmas
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
+token_auth = TokenAuth()
+cache = ResponseCache()
+request_logger = RequestLogger()
+hasher = PasswordHasher()
+metrics = Metrics()
+sql_profiler = SQLProfiler()
+rate_limiter = RateLimiter()
+job_queue = JobQueue()
+pricing = PricingEngine()
+idempotency = Idempotency()
 
-def create_app():
+def create_app(config_object=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
+
+    # Behind reverse proxies, take the client address from X-Forwarded-For
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
 
     # Initialize extensions
+    configure_engines(app)
     db.init_app(app)
+    install_sqlite_pragmas(app, db)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    token_auth.init_app(app)
+    cache.init_app(app)
+    request_logger.init_app(app)
+    hasher.init_app(app)
+    metrics.init_app(app)
+    rate_limiter.init_app(app)
+    sql_profiler.init_app(app)
+    job_queue.init_app(app)
+    pricing.init_app(app)
+    idempotency.init_app(app)
+
+    from app.serializers import FastJSONProvider, InvalidFields
+    app.json = FastJSONProvider(app)
+
+    # Reject unknown ?fields= selections on any endpoint
+    app.register_error_handler(InvalidFields, lambda error: (jsonify({"message": str(error)}), 400))
 
     # Enable CORS for all domains on all routes (for testing)
     CORS(app)
 
     # Register Blueprints
-    from app.routes import user_routes, room_routes, task_routes, reservation_routes, event_routes
+    from app.routes import user_routes, room_routes, task_routes, reservation_routes, event_routes, analytics_routes
     app.register_blueprint(user_routes, url_prefix='/api/users', name='users_routes')
     app.register_blueprint(room_routes, url_prefix='/api/rooms')
     app.register_blueprint(task_routes, url_prefix='/api/tasks')
     app.register_blueprint(reservation_routes, url_prefix='/api/reservations')
     app.register_blueprint(event_routes, url_prefix='/api/events')
+    app.register_blueprint(analytics_routes, url_prefix='/api/analytics')
+
+    # CLI commands
+    from app.utils.rollups import rollups_cli
+    from app.utils.search import search_cli
+    from app.utils.jobs import jobs_cli
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(jobs_cli)
+
+    # Background job handlers (enqueued by the routes, run by worker.py)
+    from app import jobs  # noqa: F401
 
     return app
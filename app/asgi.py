@@ -0,0 +1,217 @@
+"""
+ASGI serving mode.
+
+The hot, read-only catalog endpoints are served by native ``async`` handlers on
+SQLAlchemy's async engine (aiosqlite locally), so thousands of concurrent
+connections share one event loop instead of needing one thread each. Every
+other route is delegated unchanged to the Flask application through a2wsgi,
+which runs it on a pool of ``ASGI_WSGI_WORKERS`` threads. Native handlers run
+inside a Flask request context, so the app's configuration,
+``before_request``/``after_request`` hooks, error handlers and
+``role_required`` all apply to them as well. Those are synchronous and may
+query the database (token revocations, the SQL profiler's admin check), so
+they run in a worker thread, never on the event loop.
+"""
+import asyncio
+import inspect
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from flask import jsonify, request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+from app import cache, create_app, db, sql_profiler
+from app.models import Event, Room, Task
+from app.routes.event_routes import events_in_window
+from app.serializers import event_serializer, room_serializer, task_serializer
+from app.utils.auth_helpers import role_required
+from app.utils.database import REPLICA_BIND, sqlite_pragma_setter
+from app.utils.metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
+from app.utils.pagination import NDJSON_MIMETYPE, page_args, split_page
+
+# Query parameters only the WSGI views implement (streaming exports, includes).
+WSGI_ONLY_PARAMS = ('stream', 'include')
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def async_url(url):
+    """Translate a sync engine URL to the matching asyncio driver."""
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+class AsyncAPI:
+    """ASGI application serving the catalog natively and everything else via WSGI."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_WSGI_WORKERS'])
+
+        # Reads go to the replica when one is configured, like the sync app.
+        with flask_app.app_context():
+            engines = db.engines
+        sync_engine = engines.get(REPLICA_BIND, engines[None])
+        options = dict(flask_app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+        if 'pool_size' in options:
+            # aiosqlite would otherwise open a fresh connection per checkout.
+            timed = options.get('poolclass') is TimedQueuePool
+            options['poolclass'] = TimedAsyncAdaptedQueuePool if timed else AsyncAdaptedQueuePool
+        self.engine = create_async_engine(async_url(sync_engine.url), **options)
+        self.engine.sync_engine.pool.bind_key = 'async'
+        sql_profiler.instrument(self.engine.sync_engine)
+        if sync_engine.dialect.name == 'sqlite':
+            pragmas = dict(flask_app.config['SQLITE_PRAGMAS'])
+            if sync_engine is engines.get(REPLICA_BIND):
+                pragmas.pop('journal_mode', None)
+            event.listen(self.engine.sync_engine, 'connect', sqlite_pragma_setter(pragmas))
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+
+        self.routes = Map([
+            Rule('/api/rooms/', endpoint=self.list_rooms),
+            Rule('/api/rooms/<int:room_id>', endpoint=self.get_room),
+            Rule('/api/events/', endpoint=self.list_events),
+            Rule('/api/events/<int:event_id>', endpoint=self.get_event),
+            Rule('/api/tasks/<int:task_id>', endpoint=self.get_task),
+        ]).bind('')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD') and self._is_native(scope):
+            try:
+                handler, view_args = self.routes.match(scope['path'], method='GET')
+            except HTTPException:
+                handler = None
+            if handler is not None:
+                return await self._serve(handler, view_args, scope, send)
+        return await self.wsgi(scope, receive, send)
+
+    @staticmethod
+    def _is_native(scope):
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        if any(name in query for name in WSGI_ONLY_PARAMS):
+            return False
+        accept = dict(scope['headers']).get(b'accept', b'')
+        return NDJSON_MIMETYPE.encode() not in accept
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _serve(self, handler, view_args, scope, send):
+        app = self.flask_app
+        headers = [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']]
+        client = scope.get('client') or ('', 0)
+        with app.test_request_context(
+            scope['path'],
+            method=scope['method'],
+            query_string=scope['query_string'].decode('latin-1'),
+            headers=headers,
+            environ_base={'REMOTE_ADDR': client[0]}
+        ):
+            # Threads copy the context, so the hooks still see this request.
+            response = await asyncio.to_thread(app.preprocess_request)
+            if response is None:
+                try:
+                    if inspect.iscoroutinefunction(handler):
+                        rv = handler(**view_args)
+                    else:
+                        # Sync wrappers (role_required) authenticate before returning the coroutine
+                        rv = await asyncio.to_thread(handler, **view_args)
+                    if inspect.isawaitable(rv):
+                        rv = await rv
+                except Exception as error:
+                    try:
+                        rv = app.handle_user_exception(error)
+                    except Exception as unhandled:
+                        rv = app.handle_exception(unhandled)
+                response = app.make_response(rv)
+            else:
+                response = app.make_response(response)
+            response = await asyncio.to_thread(app.process_response, response)
+            if response.status_code == 200 and not response.is_streamed:
+                response.add_etag()
+                response = response.make_conditional(request)
+
+            # 304s and HEAD responses carry headers only.
+            body = b'' if scope['method'] == 'HEAD' or response.status_code == 304 else response.get_data()
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                # The server adds its own Date header.
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in response.headers.items() if name.lower() != 'date'],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+
+    async def _fetch(self, statement):
+        async with self.session() as session:
+            return (await session.execute(statement)).all()
+
+    async def _list(self, serializer, key, narrow=None):
+        """Async counterpart of ``list_response`` (without streaming); ``narrow`` filters the statement."""
+        fields = serializer.requested()
+        serialize = serializer.row_serializer(fields)
+        statement = serializer.statement(fields).order_by(key)
+        if narrow is not None:
+            try:
+                statement = narrow(statement)
+            except ValueError as error:
+                return jsonify({"message": str(error)}), 400
+        if 'limit' not in request.args and 'after' not in request.args:
+            return jsonify([serialize(row) for row in await self._fetch(statement)]), 200
+
+        try:
+            limit, after = page_args(key)
+        except ValueError:
+            return jsonify({"message": "Invalid pagination parameters"}), 400
+        if after is not None:
+            statement = statement.where(key > after)
+        rows, next_cursor = split_page(await self._fetch(statement.limit(limit + 1)), key, limit)
+        return jsonify({"items": [serialize(row) for row in rows], "next_cursor": next_cursor}), 200
+
+    async def _detail(self, serializer, object_id, missing):
+        fields = serializer.requested()
+        rows = await self._fetch(serializer.statement(fields).where(serializer.model.id == object_id))
+        if not rows:
+            return jsonify({"message": missing}), 404
+        return jsonify(serializer.row_serializer(fields)(rows[0])), 200
+
+    @cache.cached('rooms')
+    async def list_rooms(self):
+        return await self._list(room_serializer, Room.id)
+
+    @cache.cached('rooms')
+    async def get_room(self, room_id):
+        return await self._detail(room_serializer, room_id, "Room not found")
+
+    @cache.cached('events')
+    async def list_events(self):
+        return await self._list(event_serializer, Event.id, events_in_window)
+
+    @cache.cached('events')
+    async def get_event(self, event_id):
+        return await self._detail(event_serializer, event_id, "Event not found")
+
+    @role_required(['admin', 'staff'])
+    async def get_task(self, task_id):
+        return await self._detail(task_serializer, task_id, "Task not found")
+
+
+def create_asgi_app():
+    """Build the ASGI application around a regular ``create_app()`` instance."""
+    return AsyncAPI(create_app())
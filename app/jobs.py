@@ -0,0 +1,95 @@
+"""
+Background job handlers, run by worker.py. Routes only enqueue these (see
+:class:`app.utils.jobs.JobQueue`); all delivery goes through the notifier.
+Jobs may run more than once, so every handler re-reads the current state and
+does nothing when its work no longer applies.
+"""
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from app import job_queue
+from app.models import Job, Reservation, RevokedToken, Task, User, db, utcnow
+from app.utils.notify import notifier
+
+
+@job_queue.handler('booking_confirmation')
+def booking_confirmation(reservation_id):
+    """Send the guest the confirmation of a new reservation."""
+    booking = db.session.query(
+        Reservation.check_in, Reservation.check_out, Reservation.price, User.name, User.email
+    ).join(User, Reservation.customer_id == User.id).filter(Reservation.id == reservation_id).first()
+    if booking is None:
+        return  # cancelled in the meantime
+    notifier().send(
+        booking.email, f"Booking #{reservation_id} confirmed",
+        f"Hi {booking.name}, your stay from {booking.check_in} to {booking.check_out} is confirmed. "
+        f"Total: {booking.price:.2f}."
+    )
+
+
+@job_queue.handler('task_assigned')
+def task_assigned(task_id, user_id):
+    """Tell a staff member about a task assigned to them."""
+    task = db.session.query(Task.title, Task.due_date, User.email).join(
+        User, Task.user_assigned == User.id
+    ).filter(Task.id == task_id, Task.user_assigned == user_id).first()
+    if task is None:
+        return  # deleted or reassigned since
+    notifier().send(task.email, f"New task: {task.title}", f"Due {task.due_date:%Y-%m-%d %H:%M}.")
+
+
+@job_queue.handler('task_due_reminder')
+def task_due_reminder(task_id, due_date):
+    """Remind the assignee of an open task that is coming due."""
+    task = db.session.query(Task.title, Task.due_date, User.email).join(
+        User, Task.user_assigned == User.id
+    ).filter(Task.id == task_id, Task.status != 'completed').first()
+    if task is None or task.due_date.isoformat() != due_date:
+        return  # done, unassigned or rescheduled since
+    notifier().send(task.email, f"Reminder: {task.title}", f"Due {task.due_date:%Y-%m-%d %H:%M}.")
+
+
+def _slot_time(slot):
+    """Naive UTC datetime of a job slot, comparable with the stored columns."""
+    return datetime.fromtimestamp(slot, timezone.utc).replace(tzinfo=None)
+
+
+@job_queue.handler('task_due_reminders', every='TASK_REMINDER_INTERVAL')
+def task_due_reminders(slot):
+    """
+    Queue a reminder for every open, assigned task coming due
+    ``TASK_REMINDER_LEAD_MINUTES`` after this interval. Each sweep starts
+    where the last completed one stopped, so tasks that came due while no
+    worker was running are still reminded (late) on the next sweep, as far
+    back as ``TASK_REMINDER_MAX_CATCHUP`` seconds; the job key keeps every
+    (task, due date) to one reminder. Slots are Unix times, due dates naive UTC.
+    """
+    config = current_app.config
+    lead = timedelta(minutes=config['TASK_REMINDER_LEAD_MINUTES'])
+    interval = timedelta(seconds=config['TASK_REMINDER_INTERVAL'])
+    start = _slot_time(slot) + lead
+    end = start + interval
+    oldest = start - timedelta(seconds=config['TASK_REMINDER_MAX_CATCHUP'])
+    last = db.session.query(Job.payload).filter(
+        Job.name == 'task_due_reminders', Job.status == 'done'
+    ).order_by(Job.run_at.desc()).first()
+    if last is not None and last.payload['slot'] < slot:
+        start = max(oldest, min(start, _slot_time(last.payload['slot']) + lead + interval))
+
+    due = db.session.query(Task.id, Task.due_date).filter(
+        Task.status.in_(('pending', 'in_progress')),
+        Task.due_date >= start, Task.due_date < end,
+        Task.user_assigned.isnot(None)
+    )
+    for task_id, due_date in due:
+        job_queue.enqueue('task_due_reminder', {"task_id": task_id, "due_date": due_date.isoformat()},
+                          key=f'task_due_reminder:{task_id}:{due_date.isoformat()}')
+
+
+@job_queue.handler('housekeeping', every=3600)
+def housekeeping(slot):
+    """Drop finished jobs past ``JOBS_RETENTION_DAYS`` and revocations of expired tokens."""
+    cutoff = utcnow() - timedelta(days=current_app.config['JOBS_RETENTION_DAYS'])
+    db.session.query(Job).filter(Job.status == 'done', Job.finished_at < cutoff).delete(synchronize_session=False)
+    db.session.query(RevokedToken).filter(RevokedToken.expires < slot).delete(synchronize_session=False)
@@ -1,5 +1,12 @@
-from werkzeug.security import generate_password_hash, check_password_hash
-from . import db
+from datetime import datetime, timezone
+
+from . import db, hasher
+
+
+def utcnow():
+    """Naive UTC timestamp with microseconds (CURRENT_TIMESTAMP only has seconds)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -11,11 +18,15 @@ class User(db.Model):
 
     def set_password(self, password):
         """Hashes the password and stores it in the password_hash field."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password):
         """Checks if the provided password matches the stored hash."""
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """Checks if the stored hash predates the configured hash parameters."""
+        return hasher.needs_rehash(self.password_hash)
 
 class Room(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -24,6 +35,25 @@ class Room(db.Model):
     square_meters = db.Column(db.Float, nullable=False)
     price_per_night = db.Column(db.Float, nullable=False)
     images_list = db.Column(db.JSON)
+    # Bumped by every booking; used as an optimistic per-room lock.
+    booking_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class RateRule(db.Model):
+    """Seasonal/date-based nightly rate for one room, or for every room when room_id is null."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'))
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)  # exclusive
+    weekdays = db.Column(db.Integer)  # bitmask, Monday = 1 ... Sunday = 64; null = every night
+    price = db.Column(db.Float)  # fixed nightly price, or else
+    multiplier = db.Column(db.Float)  # factor on Room.price_per_night
+    # Where rules overlap the highest priority wins, then room rules over global ones
+    priority = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_rate_rule_room_dates', 'room_id', 'start_date', 'end_date'),
+    )
 
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -33,6 +63,14 @@ class Task(db.Model):
     status = db.Column(db.Enum('pending', 'in_progress', 'completed', name='task_status'), nullable=False)
     user_assigned = db.Column(db.Integer, db.ForeignKey('user.id'))
     assigned_user = db.relationship('User', backref='tasks')
+
+    __table_args__ = (
+        # Task board filters: one assignee's tasks by status and due date, and
+        # everyone's by status and due date (e.g. overdue).
+        db.Index('ix_task_assignee_status_due', 'user_assigned', 'status', 'due_date'),
+        db.Index('ix_task_status_due', 'status', 'due_date'),
+    )
+
 class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -41,6 +79,14 @@ class Event(db.Model):
     time = db.Column(db.Time, nullable=False)
     location = db.Column(db.String(100), nullable=False)
     image = db.Column(db.String(255), nullable=True)  # Add image column
+    # Validator for conditional GETs of the calendar feed
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow,
+                           server_default=db.func.current_timestamp())
+
+    __table_args__ = (
+        # Date-range calendar queries: (date, time) >= (from) AND < (to)
+        db.Index('ix_event_date_time', 'date', 'time'),
+    )
 
 class Reservation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -52,3 +98,59 @@ class Reservation(db.Model):
     price = db.Column(db.Float, nullable=False)
     room = db.relationship('Room', backref='reservations')
     customer = db.relationship('User', backref='reservations')
+
+    __table_args__ = (
+        # Serves the per-room date overlap probe used by availability search.
+        db.Index('ix_reservation_room_dates', 'room_id', 'check_in', 'check_out'),
+    )
+
+    @staticmethod
+    def overlaps(check_in, check_out):
+        """SQL condition matching reservations that overlap [check_in, check_out)."""
+        return db.and_(Reservation.check_in < check_out, Reservation.check_out > check_in)
+
+
+class RevokedToken(db.Model):
+    """Access tokens revoked before their expiry (e.g. on logout)."""
+    jti = db.Column(db.String(36), primary_key=True)
+    expires = db.Column(db.Integer, nullable=False)  # the token's exp claim
+    revoked_at = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_revoked_token_revoked_at', 'revoked_at'),
+    )
+
+
+class Job(db.Model):
+    """Background job queued by a request (or the scheduler) and run by worker.py."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # Optional deduplication key: a second job with the same key is not queued.
+    key = db.Column(db.String(200), unique=True)
+    status = db.Column(db.Enum('queued', 'running', 'done', 'failed', name='job_status'), nullable=False,
+                       default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime, nullable=False)  # UTC
+    locked_until = db.Column(db.DateTime)  # lease of the worker running it
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Serves the worker's "due jobs" claim query.
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+
+class RoomDailyStat(db.Model):
+    """Per room, per night occupancy and revenue, maintained incrementally."""
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    occupied = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.Index('ix_room_daily_stat_day', 'day'),
+    )
@@ -3,4 +3,5 @@ from .room_routes import bp as room_routes
 from .reservation_routes import bp as reservation_routes
 from .event_routes import bp as event_routes
 from .task_routes import bp as task_routes
+from .analytics_routes import bp as analytics_routes
 
@@ -0,0 +1,68 @@
+from flask import Blueprint, current_app, request, jsonify
+from app.models import Room, RoomDailyStat, db
+from datetime import datetime, timedelta
+from app.serializers import encode_date
+from app.utils.auth_helpers import role_required
+
+bp = Blueprint('analytics_routes', __name__)
+
+@bp.route('/occupancy', methods=['GET'])
+@role_required(['admin'])
+def occupancy():
+    """
+    Occupancy rate and revenue per day or month, read from the daily rollups.
+
+    Query parameters: ``from`` and ``to`` (inclusive, YYYY-MM-DD), optional
+    ``room_id`` and ``granularity`` (``day`` or ``month``). Cost depends on the
+    number of days in the range, not on the number of reservations.
+    """
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date()
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date()
+    except KeyError:
+        return jsonify({"message": "Missing required fields"}), 400
+    except ValueError:
+        return jsonify({"message": "Invalid date format. Use YYYY-MM-DD"}), 400
+    if end < start:
+        return jsonify({"message": "'to' must not be before 'from'"}), 400
+    max_days = current_app.config['ANALYTICS_MAX_RANGE_DAYS']
+    if (end - start).days + 1 > max_days:
+        return jsonify({"message": f"Range must not exceed {max_days} days"}), 400
+
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ('day', 'month'):
+        return jsonify({"message": "Invalid granularity. Use 'day' or 'month'"}), 400
+
+    room_id = request.args.get('room_id', type=int)
+    query = db.session.query(
+        RoomDailyStat.day, db.func.sum(RoomDailyStat.occupied), db.func.sum(RoomDailyStat.revenue)
+    ).filter(RoomDailyStat.day.between(start, end))
+    if room_id is not None:
+        if db.session.get(Room, room_id) is None:
+            return jsonify({"message": "Room not found"}), 404
+        query = query.filter(RoomDailyStat.room_id == room_id)
+        rooms = 1
+    else:
+        rooms = db.session.query(db.func.count(Room.id)).scalar()
+    by_day = {day: (occupied, revenue) for day, occupied, revenue in query.group_by(RoomDailyStat.day)}
+
+    # Walk the calendar so days without bookings show up as zero occupancy.
+    periods = {}
+    day = start
+    while day <= end:
+        period = encode_date(day) if granularity == 'day' else day.strftime('%Y-%m')
+        occupied, revenue = by_day.get(day, (0, 0.0))
+        totals = periods.setdefault(period, [0, 0, 0.0])
+        totals[0] += occupied
+        totals[1] += rooms
+        totals[2] += revenue
+        day += timedelta(days=1)
+
+    return jsonify([{
+        "period": period,
+        "room_id": room_id,
+        "occupied_nights": occupied,
+        "available_nights": available,
+        "occupancy_rate": round(occupied / available, 4) if available else 0.0,
+        "revenue": round(revenue, 2)
+    } for period, (occupied, available, revenue) in periods.items()]), 200
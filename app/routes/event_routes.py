@@ -1,86 +1,154 @@
 from flask import Blueprint, request, jsonify
+from app import cache, idempotency
 from app.models import Event, db
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.serializers import event_serializer
 from datetime import datetime
 from app.utils.auth_helpers import role_required
+from app.utils.pagination import list_response
+from app.utils.bulk import bulk_write
+from app.utils.search import event_index, search_response
+from app.utils.cache import not_modified, set_validators
+from app.utils.ical import calendar_response
+from sqlalchemy import tuple_
+import hashlib
 
 bp = Blueprint('event_routes', __name__)
 
+EVENT_FIELDS = ('title', 'description', 'date', 'time', 'location')
+
+
+def _event_values(data, partial=False):
+    """Validate an event payload and return its column values."""
+    if not partial and not all(data.get(field) for field in EVENT_FIELDS):
+        raise ValueError("Missing required fields")
+
+    values = {field: data[field] for field in EVENT_FIELDS + ('image',) if field in data}
+    # Convert date and time strings to datetime.date and datetime.time objects
+    try:
+        if 'date' in values:
+            values['date'] = datetime.strptime(values['date'], '%Y-%m-%d').date()
+        if 'time' in values:
+            values['time'] = datetime.strptime(values['time'], '%H:%M:%S').time()
+    except (TypeError, ValueError):
+        raise ValueError("Invalid date or time format")
+    return values
+
+
 @bp.route('/create', methods=['POST'])
-@jwt_required()
 @role_required(['admin'])
+@idempotency.idempotent
 def create_event():
     """Create a new event."""
     data = request.json
-    title = data.get('title')
-    description = data.get('description')
-    date = data.get('date')
-    time = data.get('time')
-    location = data.get('location')
-    image = data.get('image')  # Accept image field
-
-    # Validate inputs
-    if not all([title, description, date, time, location]):
-        return jsonify({"message": "Missing required fields"}), 400
 
-    # Convert date and time strings to datetime.date and datetime.time objects
+    # Validate inputs and create the event
     try:
-        event_date = datetime.strptime(date, '%Y-%m-%d').date()
-        event_time = datetime.strptime(time, '%H:%M:%S').time()
-    except ValueError:
-        return jsonify({"message": "Invalid date or time format"}), 400
-
-    # Create and save the event
-    event = Event(
-        title=title,
-        description=description,
-        date=event_date,
-        time=event_time,
-        location=location,
-        image=image  # Save image field
-    )
+        event = Event(**_event_values(data))
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
     db.session.add(event)
     db.session.commit()
+    cache.invalidate('events')
 
     return jsonify({"message": "Event created successfully"}), 201
 
 
+@bp.route('/bulk', methods=['POST', 'PUT'])
+@role_required(['admin'])
+def bulk_events():
+    """Create (POST) or update (PUT) many events in one transaction."""
+    return bulk_write(Event, _event_values, after_commit=lambda: cache.invalidate('events'))
+
+
+def _parse_bound(value):
+    """Parse a window bound: YYYY-MM-DD (midnight) or YYYY-MM-DD[T ]HH:MM[:SS]."""
+    bound = datetime.fromisoformat(value)
+    return bound.date(), bound.time()
+
+
+def events_in_window(query):
+    """
+    Restrict ``query`` (ORM query or Core select) to events starting in
+    ``[?from=, ?to=)``; either bound may be omitted. Raises ValueError when a
+    bound is malformed.
+
+    The row-value comparison on (date, time) is a range scan of
+    ``ix_event_date_time``.
+    """
+    start = request.args.get('from')
+    end = request.args.get('to')
+    try:
+        if start:
+            query = query.filter(tuple_(Event.date, Event.time) >= _parse_bound(start))
+        if end:
+            query = query.filter(tuple_(Event.date, Event.time) < _parse_bound(end))
+    except ValueError:
+        raise ValueError("Invalid from/to. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS")
+    return query
+
+
 @bp.route('/', methods=['GET'])
+@cache.cached('events')
 def list_events():
-    """List all events."""
-    events = Event.query.all()
-    return jsonify([{
-        "id": event.id,
-        "title": event.title,
-        "description": event.description,
-        "date": str(event.date),
-        "time": str(event.time),
-        "location": event.location,
-        "image": event.image  # Include image in response
-    } for event in events]), 200
+    """List events, optionally only those starting in [?from=, ?to=)."""
+    fields = event_serializer.requested()
+    try:
+        query = events_in_window(event_serializer.select(Event.query, fields))
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+    return list_response(query, Event.id, event_serializer.row_serializer(fields))
+
+
+@bp.route('/calendar.ics', methods=['GET'])
+def events_calendar():
+    """
+    Stream events starting in [?from=, ?to=) as an iCalendar feed.
+
+    The validators come from one aggregate over the window (event count and
+    latest ``updated_at``: an edit raises the latter, a deletion lowers the
+    former), so unchanged feeds are answered with 304 before any event is read.
+    No Last-Modified is sent: ``If-Modified-Since`` alone cannot see deletions.
+    """
+    try:
+        window = events_in_window(Event.query)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    count, last_modified = window.with_entities(db.func.count(Event.id), db.func.max(Event.updated_at)).one()
+    etag = hashlib.sha256(
+        f"{count}|{last_modified}|{request.args.get('from')}|{request.args.get('to')}".encode()
+    ).hexdigest()
+    response = not_modified(etag)
+    if response is not None:
+        return response
+
+    rows = window.with_entities(
+        Event.id, Event.title, Event.description, Event.date, Event.time, Event.location, Event.updated_at
+    ).order_by(Event.date, Event.time, Event.id)
+    return set_validators(calendar_response(rows, 'Hotel events'), etag)
+
 
+@bp.route('/search', methods=['GET'])
+@cache.cached('events')
+def search_events():
+    """Full-text search over event titles, descriptions and locations, best match first."""
+    return search_response(event_index, event_serializer)
 
 
 @bp.route('/<int:event_id>', methods=['GET'])
+@cache.cached('events')
 def get_event(event_id):
     """Retrieve a specific event."""
-    event = Event.query.get(event_id)
+    fields = event_serializer.requested()
+    event = event_serializer.select(Event.query, fields).filter(Event.id == event_id).first()
     if not event:
         return jsonify({"message": "Event not found"}), 404
 
-    return jsonify({
-        "id": event.id,
-        "title": event.title,
-        "description": event.description,
-        "date": str(event.date),
-        "time": str(event.time),
-        "location": event.location,
-        "image": event.image  # Include image in response
-    }), 200
+    return jsonify(event_serializer.row_serializer(fields)(event)), 200
 
 
 @bp.route('/<int:event_id>', methods=['PUT'])
-@jwt_required()
 @role_required(['admin'])
 def update_event(event_id):
     """Update an existing event."""
@@ -88,15 +156,15 @@ def update_event(event_id):
     if not event:
         return jsonify({"message": "Event not found"}), 404
 
-    data = request.json
-    event.title = data.get('title', event.title)
-    event.description = data.get('description', event.description)
-    event.date = data.get('date', event.date)
-    event.time = data.get('time', event.time)
-    event.location = data.get('location', event.location)
-    event.image = data.get('image', event.image)  # Allow image update
+    try:
+        values = _event_values(request.json, partial=True)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+    for field, value in values.items():
+        setattr(event, field, value)
 
     db.session.commit()
+    cache.invalidate('events')
     return jsonify({"message": "Event updated successfully"}), 200
 
 
@@ -110,4 +178,5 @@ def delete_event(event_id):
 
     db.session.delete(event)
     db.session.commit()
+    cache.invalidate('events')
     return jsonify({"message": "Event deleted successfully"}), 200
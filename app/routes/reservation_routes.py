@@ -1,25 +1,47 @@
 from flask import Blueprint, request, jsonify
+from app import idempotency, job_queue, pricing
 from app.models import Reservation, Room, User, db
+from app.serializers import encode_date, reservation_serializer
 from datetime import datetime
-from flask_jwt_extended import get_jwt_identity
-from app.utils.auth_helpers import role_required
+from app.utils.auth_helpers import current_identity, role_required
+from app.utils.pagination import list_response
+from app.utils.booking import book_room, move_booking, BookingConflict, BookingContention, RoomNotFound
+from app.utils.rollups import record_stay
 
 bp = Blueprint('reservation_routes', __name__)
 
+# Default fields of the customer-facing listing
+MY_RESERVATION_FIELDS = ('id', 'room_id', 'check_in', 'check_out', 'price')
+# Includes exposing guests (users rows); the public listing only embeds them for these roles
+GUEST_INCLUDES = ('customer',)
+STAFF_ROLES = ('admin', 'staff')
+
+def _conflict_response(conflict):
+    return jsonify({
+        "message": "Room is already booked for the requested dates",
+        "conflict": {
+            "reservation_id": conflict.reservation_id,
+            "check_in": encode_date(conflict.check_in),
+            "check_out": encode_date(conflict.check_out)
+        }
+    }), 409
+
+
 @bp.route('/create', methods=['POST'])
+@idempotency.idempotent
 def create_reservation():
     """Create a new reservation."""
     data = request.json
     room_id = data.get('room_id')
     customer_id = data.get('customer_id')
-    nights = data.get('nights')
     check_in = data.get('check_in')
     check_out = data.get('check_out')
-    price = data.get('price')
 
-    # Validate inputs
-    if not all([room_id, customer_id, nights, check_in, check_out, price]):
+    # Validate inputs; nights and price are computed, never taken from the client
+    if not all([room_id, customer_id, check_in, check_out]):
         return jsonify({"message": "Missing required fields"}), 400
+    if isinstance(room_id, bool) or not isinstance(room_id, int):
+        return jsonify({"message": "room_id must be an integer"}), 400
 
     # Convert check_in and check_out to datetime.date objects
     try:
@@ -28,80 +50,119 @@ def create_reservation():
     except ValueError:
         return jsonify({"message": "Invalid date format. Use YYYY-MM-DD"}), 400
 
-    # Check if the room exists
-    room = Room.query.get(room_id)
-    if not room:
-        return jsonify({"message": "Room not found"}), 404
+    if check_out_date <= check_in_date:
+        return jsonify({"message": "check_out must be after check_in"}), 400
 
     # Check if the customer exists
-    customer = User.query.get(customer_id)
-    if not customer:
+    if not db.session.query(User.id).filter_by(id=customer_id).first():
         return jsonify({"message": "Customer not found"}), 404
 
-    # Create and save the reservation
-    reservation = Reservation(
-        room_id=room_id,
-        customer_id=customer_id,
-        nights=nights,
-        check_in=check_in_date,
-        check_out=check_out_date,
-        price=price
-    )
-    db.session.add(reservation)
-    db.session.commit()
+    nights = (check_out_date - check_in_date).days
+    price = pricing.quote(room_id, check_in_date, check_out_date)
+    if price is None:
+        return jsonify({"message": "Room not found"}), 404
+
+    def confirm(reservation):
+        # Queued in the booking transaction; the worker sends it after commit
+        job_queue.enqueue('booking_confirmation', {"reservation_id": reservation.id})
 
-    return jsonify({"message": "Reservation created successfully"}), 201
+    # Create and save the reservation, rejecting overlaps for the same room
+    try:
+        reservation = book_room(room_id, customer_id, nights, check_in_date, check_out_date, price, on_booked=confirm)
+    except RoomNotFound:
+        return jsonify({"message": "Room not found"}), 404
+    except BookingConflict as conflict:
+        return _conflict_response(conflict)
+    except BookingContention:
+        return jsonify({"message": "Room is busy, please retry"}), 503, {"Retry-After": "1"}
+
+    return jsonify({
+        "message": "Reservation created successfully",
+        "reservation_id": reservation.id,
+        "nights": nights,
+        "price": price
+    }), 201
 
 @bp.route('/', methods=['GET'])
 def list_reservations():
-    """List all reservations."""
-    reservations = Reservation.query.all()
-    return jsonify([{
-        "id": reservation.id,
-        "room_id": reservation.room_id,
-        "customer_id": reservation.customer_id,
-        "nights": reservation.nights,
-        "check_in": reservation.check_in,
-        "check_out": reservation.check_out,
-        "price": reservation.price
-    } for reservation in reservations]), 200
+    """List all reservations, optionally embedding ?include=room (and customer, for staff)."""
+    includes = reservation_serializer.requested_includes()
+    if any(name in GUEST_INCLUDES for name in includes):
+        user = current_identity(optional=True)
+        if not user or user['role'] not in STAFF_ROLES:
+            return jsonify({"message": "Access forbidden: ?include=customer requires a staff account"}), 403
+    fields = reservation_serializer.requested(includes=includes)
+    return list_response(
+        reservation_serializer.select(Reservation.query, fields),
+        Reservation.id,
+        reservation_serializer.row_serializer(fields),
+        reservation_serializer.expander(includes)
+    )
 
 
 @bp.route('/<int:reservation_id>', methods=['GET'])
 @role_required(['admin'])
 def get_reservation(reservation_id):
     """Retrieve a specific reservation."""
-    reservation = Reservation.query.get(reservation_id)
+    includes = reservation_serializer.requested_includes()
+    fields = reservation_serializer.requested(includes=includes)
+    reservation = reservation_serializer.select(Reservation.query, fields).filter(
+        Reservation.id == reservation_id
+    ).first()
     if not reservation:
         return jsonify({"message": "Reservation not found"}), 404
 
-    return jsonify({
-        "id": reservation.id,
-        "room_id": reservation.room_id,
-        "customer_id": reservation.customer_id,
-        "nights": reservation.nights,
-        "check_in": reservation.check_in,
-        "check_out": reservation.check_out,
-        "price": reservation.price
-    }), 200
+    item = reservation_serializer.row_serializer(fields)(reservation)
+    return jsonify(reservation_serializer.expander(includes)([item])[0]), 200
 
 
 @bp.route('/<int:reservation_id>', methods=['PUT'])
 @role_required(['admin'])
 def update_reservation(reservation_id):
-    """Update an existing reservation."""
+    """Update an existing reservation, moving it to other dates or another room."""
     reservation = Reservation.query.get(reservation_id)
     if not reservation:
         return jsonify({"message": "Reservation not found"}), 404
 
     data = request.json
-    reservation.nights = data.get('nights', reservation.nights)
-    reservation.check_in = data.get('check_in', reservation.check_in)
-    reservation.check_out = data.get('check_out', reservation.check_out)
-    reservation.price = data.get('price', reservation.price)
+    room_id = data.get('room_id', reservation.room_id)
+    if isinstance(room_id, bool) or not isinstance(room_id, int):
+        return jsonify({"message": "room_id must be an integer"}), 400
+    check_in, check_out = reservation.check_in, reservation.check_out
+    try:
+        if 'check_in' in data:
+            check_in = datetime.strptime(data['check_in'], '%Y-%m-%d').date()
+        if 'check_out' in data:
+            check_out = datetime.strptime(data['check_out'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return jsonify({"message": "Invalid date format. Use YYYY-MM-DD"}), 400
+    if check_out <= check_in:
+        return jsonify({"message": "check_out must be after check_in"}), 400
+
+    # A moved stay is repriced by the engine; the price is only overridable for the same stay
+    nights = (check_out - check_in).days
+    if (room_id, check_in, check_out) != (reservation.room_id, reservation.check_in, reservation.check_out):
+        price = pricing.quote(room_id, check_in, check_out)
+        if price is None:
+            return jsonify({"message": "Room not found"}), 404
+    else:
+        price = data.get('price', reservation.price)
+        if isinstance(price, bool) or not isinstance(price, (int, float)) or price < 0:
+            return jsonify({"message": "price must be a non-negative number"}), 400
+
+    # Same overlap check and per-room version bump as a new booking
+    try:
+        moved = move_booking(reservation_id, room_id, check_in, check_out, nights, price)
+    except RoomNotFound:
+        return jsonify({"message": "Room not found"}), 404
+    except BookingConflict as conflict:
+        return _conflict_response(conflict)
+    except BookingContention:
+        return jsonify({"message": "Room is busy, please retry"}), 503, {"Retry-After": "1"}
+    if moved is None:
+        return jsonify({"message": "Reservation not found"}), 404
 
-    db.session.commit()
-    return jsonify({"message": "Reservation updated successfully"}), 200
+    return jsonify({"message": "Reservation updated successfully", "nights": nights, "price": price}), 200
 
 
 @bp.route('/<int:reservation_id>', methods=['DELETE'])
@@ -112,6 +173,7 @@ def delete_reservation(reservation_id):
     if not reservation:
         return jsonify({"message": "Reservation not found"}), 404
 
+    record_stay(reservation.room_id, reservation.check_in, reservation.check_out, reservation.price, sign=-1)
     db.session.delete(reservation)
     db.session.commit()
     return jsonify({"message": "Reservation deleted successfully"}), 200
@@ -120,17 +182,14 @@ def delete_reservation(reservation_id):
 @role_required(['customer'])  # Restrict access to customers only
 def my_reservations():
     """Retrieve reservations for the logged-in customer."""
-    user = get_jwt_identity()  # Extract customer identity from JWT
-    reservations = Reservation.query.filter_by(customer_id=user['id']).all()
-    
+    user = current_identity()  # Extract customer identity from JWT
+    includes = reservation_serializer.requested_includes()
+    fields = reservation_serializer.requested(default=MY_RESERVATION_FIELDS, includes=includes)
+    reservations = reservation_serializer.select(Reservation.query, fields).filter(
+        Reservation.customer_id == user['id']
+    ).all()
+
     # Return a list of reservations for the logged-in customer
-    return jsonify([
-        {
-            "id": res.id,
-            "room_id": res.room_id,
-            "check_in": res.check_in.strftime('%Y-%m-%d'),  # Format datetime for JSON response
-            "check_out": res.check_out.strftime('%Y-%m-%d'),
-            "price": res.price
-        }
-        for res in reservations
-    ]), 200
+    serialize = reservation_serializer.row_serializer(fields)
+    expand = reservation_serializer.expander(includes)
+    return jsonify(expand([serialize(res) for res in reservations])), 200
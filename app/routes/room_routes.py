@@ -1,81 +1,270 @@
-from flask import Blueprint, request, jsonify
-from app.models import Room, db
+from flask import Blueprint, current_app, request, jsonify
+from app import cache, idempotency, pricing
+from app.models import RateRule, Room, Reservation, db
+from app.serializers import encode_date, rate_rule_serializer, room_serializer
+from datetime import datetime
 from app.utils.auth_helpers import role_required
+from app.utils.pagination import list_response
+from app.utils.bulk import bulk_write
+from app.utils.search import room_index, search_response
 
 bp = Blueprint('room_routes', __name__)
 
-@bp.before_request
-def log_request_info():
-    print(f"Headers: {request.headers}")
-    print(f"Body: {request.get_data()}")
+ROOM_FIELDS = ('name', 'description', 'square_meters', 'price_per_night')
+
+
+def _room_values(data, partial=False):
+    """Validate a room payload and return its column values."""
+    if not partial and not all(data.get(field) for field in ROOM_FIELDS):
+        raise ValueError("Missing required fields")
+
+    values = {field: data[field] for field in ROOM_FIELDS if field in data}
+    for field in ('square_meters', 'price_per_night'):
+        if field in values and (isinstance(values[field], bool) or not isinstance(values[field], (int, float))):
+            raise ValueError(f"{field} must be a number")
+    if 'images_list' in data or not partial:
+        values['images_list'] = data.get('images_list', [])
+    return values
+
+
+def _rooms_changed():
+    """Drop cached listings and compiled rates after room writes."""
+    cache.invalidate('rooms')
+    pricing.invalidate()
 
 
 @bp.route('/create', methods=['POST'])
 @role_required(['admin'])
+@idempotency.idempotent
 def create_room():
     """Create a new room."""
-    """Create a new room."""
-    try:
-        print(f"Raw Data: {request.data}")  # Log raw request body
-        data = request.json
-        print(f"Parsed JSON: {data}")  # Debug log
-    except Exception as e:
-        print(f"Error parsing JSON: {e}")
+    data = request.get_json(silent=True)
+    if data is None:
         return jsonify({"message": "Invalid JSON format"}), 400
-    
-    """Create a new room."""
-    data = request.json
-    name = data.get('name')
-    description = data.get('description')
-    square_meters = data.get('square_meters')
-    price_per_night = data.get('price_per_night')
-    images_list = data.get('images_list', [])
 
-    if not all([name, description, square_meters, price_per_night]):
-        return jsonify({"message": "Missing required fields"}), 400
+    try:
+        room = Room(**_room_values(data))
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
 
-    room = Room(
-        name=name,
-        description=description,
-        square_meters=square_meters,
-        price_per_night=price_per_night,
-        images_list=images_list
-    )
     db.session.add(room)
     db.session.commit()
+    cache.invalidate('rooms')
 
     return jsonify({"message": "Room created successfully"}), 201
 
 
+@bp.route('/bulk', methods=['POST', 'PUT'])
+@role_required(['admin'])
+def bulk_rooms():
+    """Create (POST) or update (PUT) many rooms in one transaction."""
+    return bulk_write(Room, _room_values, after_commit=_rooms_changed)
+
+
 @bp.route('/', methods=['GET'])
+@cache.cached('rooms')
 def list_rooms():
     """List all rooms."""
-    rooms = Room.query.all()
-    return jsonify([{
-        "id": room.id,
-        "name": room.name,
-        "description": room.description,
-        "square_meters": room.square_meters,
-        "price_per_night": room.price_per_night,
-        "images_list": room.images_list
-    } for room in rooms]), 200
+    fields = room_serializer.requested()
+    return list_response(room_serializer.select(Room.query, fields), Room.id, room_serializer.row_serializer(fields))
+
+
+@bp.route('/search', methods=['GET'])
+@cache.cached('rooms')
+def search_rooms():
+    """Full-text search over room names and descriptions, best match first."""
+    return search_response(room_index, room_serializer)
+
+
+def _parse_date(value):
+    """Parse a YYYY-MM-DD string, raising ValueError if malformed."""
+    if not isinstance(value, str):
+        raise ValueError
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+@bp.route('/quote', methods=['POST'])
+def quote_rooms():
+    """
+    Price every room in ``room_ids`` for every stay in ``stays``
+    (``[{"check_in": ..., "check_out": ...}]``) in one call.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"message": "Invalid JSON format"}), 400
+    room_ids = data.get('room_ids')
+    raw_stays = data.get('stays')
+    if not isinstance(room_ids, list) or not room_ids or not isinstance(raw_stays, list) or not raw_stays:
+        return jsonify({"message": "room_ids and stays must be non-empty arrays"}), 400
+    if not all(isinstance(room_id, int) and not isinstance(room_id, bool) for room_id in room_ids):
+        return jsonify({"message": "room_ids must be integers"}), 400
+    if len(room_ids) * len(raw_stays) > current_app.config['PRICING_MAX_QUOTES']:
+        return jsonify({"message": f"At most {current_app.config['PRICING_MAX_QUOTES']} quotes per request"}), 413
+
+    stays = []
+    for stay in raw_stays:
+        try:
+            check_in = _parse_date(stay.get('check_in')) if isinstance(stay, dict) else None
+            check_out = _parse_date(stay.get('check_out')) if isinstance(stay, dict) else None
+        except ValueError:
+            return jsonify({"message": "Invalid date format. Use YYYY-MM-DD"}), 400
+        if check_in is None or check_out is None:
+            return jsonify({"message": "Each stay needs check_in and check_out"}), 400
+        if check_out <= check_in:
+            return jsonify({"message": "check_out must be after check_in"}), 400
+        stays.append((check_in, check_out))
+
+    totals = pricing.quote_many(room_ids, stays)
+    encoded = [(encode_date(check_in), encode_date(check_out), (check_out - check_in).days)
+               for check_in, check_out in stays]
+    quotes = [
+        {"room_id": room_id, "check_in": check_in, "check_out": check_out, "nights": nights, "total": total}
+        for room_id in dict.fromkeys(room_ids) if room_id in totals
+        for (check_in, check_out, nights), total in zip(encoded, totals[room_id])
+    ]
+    not_found = [room_id for room_id in dict.fromkeys(room_ids) if room_id not in totals]
+    return jsonify({"quotes": quotes, "not_found": not_found}), 200
+
+
+def _rate_rule_values(data):
+    """Validate a rate rule payload and return its column values."""
+    name = data.get('name')
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Missing required fields")
+    try:
+        start_date = _parse_date(data.get('start_date'))
+        end_date = _parse_date(data.get('end_date'))
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD") from None
+    if end_date <= start_date:
+        raise ValueError("end_date must be after start_date")
+
+    values = {"name": name.strip(), "start_date": start_date, "end_date": end_date}
+    for field in ('room_id', 'weekdays', 'priority'):
+        value = data.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            raise ValueError(f"{field} must be an integer")
+        values[field] = value
+    if values['weekdays'] is not None and not 0 < values['weekdays'] < 128:
+        raise ValueError("weekdays must be a bitmask between 1 (Monday) and 127 (every day)")
+    values['priority'] = values['priority'] or 0
+
+    price, multiplier = data.get('price'), data.get('multiplier')
+    if (price is None) == (multiplier is None):
+        raise ValueError("Give exactly one of price or multiplier")
+    for field, value in (('price', price), ('multiplier', multiplier)):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+            raise ValueError(f"{field} must be a non-negative number")
+    values.update(price=price, multiplier=multiplier)
+    return values
+
+
+@bp.route('/rate-rules', methods=['GET'])
+@role_required(['admin'])
+def list_rate_rules():
+    """List seasonal/date-based rate rules."""
+    fields = rate_rule_serializer.requested()
+    return list_response(
+        rate_rule_serializer.select(RateRule.query, fields), RateRule.id, rate_rule_serializer.row_serializer(fields)
+    )
+
+
+@bp.route('/rate-rules', methods=['POST'])
+@role_required(['admin'])
+def create_rate_rule():
+    """Create a rate rule for one room, or for all rooms without room_id."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"message": "Invalid JSON format"}), 400
+
+    try:
+        values = _rate_rule_values(data)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+    if values['room_id'] is not None and not db.session.query(Room.id).filter_by(id=values['room_id']).first():
+        return jsonify({"message": "Room not found"}), 404
+
+    rule = RateRule(**values)
+    db.session.add(rule)
+    db.session.commit()
+    pricing.invalidate()
+    return jsonify({"message": "Rate rule created successfully", "id": rule.id}), 201
+
+
+@bp.route('/rate-rules/<int:rule_id>', methods=['DELETE'])
+@role_required(['admin'])
+def delete_rate_rule(rule_id):
+    """Delete a rate rule."""
+    deleted = RateRule.query.filter_by(id=rule_id).delete()
+    if not deleted:
+        return jsonify({"message": "Rate rule not found"}), 404
+
+    db.session.commit()
+    pricing.invalidate()
+    return jsonify({"message": "Rate rule deleted successfully"}), 200
+
+
+def _float_arg(name):
+    """Parse an optional float query parameter, raising ValueError if malformed."""
+    value = request.args.get(name)
+    return float(value) if value is not None else None
+
+
+@bp.route('/available', methods=['GET'])
+def available_rooms():
+    """List rooms with no reservation overlapping the requested stay."""
+    check_in = request.args.get('check_in')
+    check_out = request.args.get('check_out')
+    if not all([check_in, check_out]):
+        return jsonify({"message": "Missing required fields"}), 400
+
+    try:
+        check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
+        check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"message": "Invalid date format. Use YYYY-MM-DD"}), 400
+    if check_out_date <= check_in_date:
+        return jsonify({"message": "check_out must be after check_in"}), 400
+
+    try:
+        min_price = _float_arg('min_price')
+        max_price = _float_arg('max_price')
+        min_size = _float_arg('min_square_meters')
+        max_size = _float_arg('max_square_meters')
+    except ValueError:
+        return jsonify({"message": "Invalid numeric filter"}), 400
+
+    # Anti-join against the (room_id, check_in, check_out) index: one probe per room
+    # instead of loading the reservation history.
+    booked = db.session.query(Reservation.id).filter(
+        Reservation.room_id == Room.id,
+        Reservation.overlaps(check_in_date, check_out_date)
+    ).exists()
+    fields = room_serializer.requested()
+    query = room_serializer.select(Room.query, fields).filter(~booked)
+    if min_price is not None:
+        query = query.filter(Room.price_per_night >= min_price)
+    if max_price is not None:
+        query = query.filter(Room.price_per_night <= max_price)
+    if min_size is not None:
+        query = query.filter(Room.square_meters >= min_size)
+    if max_size is not None:
+        query = query.filter(Room.square_meters <= max_size)
+
+    serialize = room_serializer.row_serializer(fields)
+    return jsonify([serialize(row) for row in query.order_by(Room.id).all()]), 200
 
 
 @bp.route('/<int:room_id>', methods=['GET'])
+@cache.cached('rooms')
 def get_room(room_id):
     """Retrieve details of a specific room."""
-    room = Room.query.get(room_id)
+    fields = room_serializer.requested()
+    room = room_serializer.select(Room.query, fields).filter(Room.id == room_id).first()
     if not room:
         return jsonify({"message": "Room not found"}), 404
 
-    return jsonify({
-        "id": room.id,
-        "name": room.name,
-        "description": room.description,
-        "square_meters": room.square_meters,
-        "price_per_night": room.price_per_night,
-        "images_list": room.images_list
-    }), 200
+    return jsonify(room_serializer.row_serializer(fields)(room)), 200
 
 
 @bp.route('/<int:room_id>', methods=['PUT'])
@@ -86,14 +275,15 @@ def update_room(room_id):
     if not room:
         return jsonify({"message": "Room not found"}), 404
 
-    data = request.json
-    room.name = data.get('name', room.name)
-    room.description = data.get('description', room.description)
-    room.square_meters = data.get('square_meters', room.square_meters)
-    room.price_per_night = data.get('price_per_night', room.price_per_night)
-    room.images_list = data.get('images_list', room.images_list)
+    try:
+        values = _room_values(request.json, partial=True)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+    for field, value in values.items():
+        setattr(room, field, value)
 
     db.session.commit()
+    _rooms_changed()
     return jsonify({"message": "Room updated successfully"}), 200
 
 
@@ -107,4 +297,5 @@ def delete_room(room_id):
 
     db.session.delete(room)
     db.session.commit()
+    _rooms_changed()
     return jsonify({"message": "Room deleted successfully"}), 200
\ No newline at end of file
@@ -1,81 +1,201 @@
 from flask import Blueprint, request, jsonify
+from app import idempotency, job_queue
 from app.models import Task, User, db
+from app.serializers import task_serializer
 from datetime import datetime
-from app.utils.auth_helpers import role_required
+from app.utils.auth_helpers import current_identity, role_required
+from app.utils.pagination import list_response
+from app.utils.bulk import bulk_write
 
 bp = Blueprint('task_routes', __name__)
 
-bp = Blueprint('task_routes', __name__)
+TASK_FIELDS = ('title', 'description', 'due_date')
+TASK_STATUSES = ('pending', 'in_progress', 'completed')
+OPEN_STATUSES = ('pending', 'in_progress')
+
+
+def _user_id(value):
+    """Normalize a user id given as an int or a numeric string, raising ValueError otherwise."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError("user_assigned must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("user_assigned must be an integer") from None
+
+
+def _task_values(data, partial=False):
+    """Validate a task payload and return its column values."""
+    if not partial and not all(data.get(field) for field in TASK_FIELDS):
+        raise ValueError("Missing required fields")
+
+    values = {field: data[field] for field in TASK_FIELDS + ('status', 'user_assigned') if field in data}
+    if not partial:
+        values.setdefault('status', 'pending')  # Default status is 'pending'
+    if 'status' in values and values['status'] not in TASK_STATUSES:
+        raise ValueError("Invalid status")
+
+    if values.get('user_assigned') is not None:
+        values['user_assigned'] = _user_id(values['user_assigned'])
+
+    # Convert due_date string to datetime.datetime object
+    if 'due_date' in values:
+        try:
+            values['due_date'] = datetime.strptime(values['due_date'], '%Y-%m-%d %H:%M:%S')
+        except (TypeError, ValueError):
+            raise ValueError("Invalid due_date format. Use YYYY-MM-DD HH:MM:SS")
+    return values
+
+
+def _check_assigned_users(rows):
+    """Resolve every user_assigned in a batch with a single IN query."""
+    wanted = {values['user_assigned'] for values in rows.values() if values.get('user_assigned')}
+    found = set(db.session.scalars(db.select(User.id).where(User.id.in_(wanted)))) if wanted else set()
+    return {
+        index: "Assigned user not found"
+        for index, values in rows.items()
+        if values.get('user_assigned') and values['user_assigned'] not in found
+    }
+
 
 @bp.route('/create', methods=['POST'])
 @role_required(['admin'])
+@idempotency.idempotent
 def create_task():
     """Create a new task."""
     data = request.json
-    title = data.get('title')
-    description = data.get('description')
-    due_date = data.get('due_date')
-    status = data.get('status', 'pending')  # Default status is 'pending'
-    user_assigned = data.get('user_assigned')
 
     # Validate required fields
-    if not all([title, description, due_date]):
-        return jsonify({"message": "Missing required fields"}), 400
-
-    # Convert due_date string to datetime.datetime object
     try:
-        due_date_obj = datetime.strptime(due_date, '%Y-%m-%d %H:%M:%S')
-    except ValueError:
-        return jsonify({"message": "Invalid due_date format. Use YYYY-MM-DD HH:MM:SS"}), 400
+        values = _task_values(data)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
 
     # Check if the assigned user exists (optional validation)
-    if user_assigned and not db.session.query(User.id).filter_by(id=user_assigned).first():
+    if _check_assigned_users({0: values}):
         return jsonify({"message": "Assigned user not found"}), 404
 
-    # Create and save the task
-    task = Task(
-        title=title,
-        description=description,
-        due_date=due_date_obj,
-        status=status,
-        user_assigned=user_assigned
-    )
+    # Create and save the task; the assignee is notified by the worker after commit
+    task = Task(**values)
     db.session.add(task)
+    if task.user_assigned:
+        db.session.flush()
+        job_queue.enqueue('task_assigned', {"task_id": task.id, "user_id": task.user_assigned})
     db.session.commit()
 
     return jsonify({"message": "Task created successfully"}), 201
 
+def _notify_assignees(rows):
+    """Queue ``task_assigned`` for every bulk row that gets a new assignee."""
+    assigned = [values for values in rows if values.get('user_assigned')]
+    if not assigned:
+        return
+    # Updates run before the UPDATE, so these are the previous assignees
+    previous = dict(db.session.query(Task.id, Task.user_assigned).filter(
+        Task.id.in_([values['id'] for values in assigned])
+    )) if request.method == 'PUT' else {}
+    for values in assigned:
+        if previous.get(values['id']) != values['user_assigned']:
+            job_queue.enqueue('task_assigned', {"task_id": values['id'], "user_id": values['user_assigned']})
+
+
+@bp.route('/bulk', methods=['POST', 'PUT'])
+@role_required(['admin'])
+def bulk_tasks():
+    """Create (POST) or update (PUT) many tasks in one transaction."""
+    return bulk_write(Task, _task_values, check=_check_assigned_users, on_write=_notify_assignees)
+
+
+def _parse_due(value):
+    """Parse a due-date bound given as YYYY-MM-DD or YYYY-MM-DD HH:MM:SS."""
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError(value)
+
+
+def _filter_tasks(query, statuses=None):
+    """
+    Apply ``?status=a,b``, ``?user_assigned=``, ``?due_from=``/``?due_to=``
+    (a half-open range, so "due today" is ``due_from=<today>&due_to=<tomorrow>``)
+    and ``?overdue=true`` (open tasks past their due date) to ``query``.
+    ``statuses`` is the default status filter. Raises ValueError when malformed.
+
+    Every combination is served by ``ix_task_assignee_status_due`` or
+    ``ix_task_status_due``, so a board refresh reads only the matching rows.
+    """
+    args = request.args
+    if 'status' in args:
+        statuses = tuple(status.strip() for status in args['status'].split(',') if status.strip())
+        if not statuses or set(statuses).difference(TASK_STATUSES):
+            raise ValueError("Invalid status")
+    if args.get('overdue', '').lower() in ('1', 'true'):
+        statuses = tuple(status for status in (statuses or TASK_STATUSES) if status in OPEN_STATUSES)
+        query = query.filter(Task.due_date < datetime.now())
+    if statuses is not None:
+        query = query.filter(Task.status.in_(statuses))
+
+    if 'user_assigned' in args:
+        try:
+            query = query.filter(Task.user_assigned == int(args['user_assigned']))
+        except ValueError:
+            raise ValueError("Invalid user_assigned")
+
+    try:
+        if 'due_from' in args:
+            query = query.filter(Task.due_date >= _parse_due(args['due_from']))
+        if 'due_to' in args:
+            query = query.filter(Task.due_date < _parse_due(args['due_to']))
+    except ValueError:
+        raise ValueError("Invalid due date filter. Use YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
+    return query
+
+
+def _task_list(query, statuses=None):
+    """Serve the filtered ``query`` as a task list, optionally embedding ?include=assigned_user."""
+    includes = task_serializer.requested_includes()
+    fields = task_serializer.requested(includes=includes)
+    try:
+        query = _filter_tasks(task_serializer.select(query, fields), statuses)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+    return list_response(
+        query,
+        Task.id,
+        task_serializer.row_serializer(fields),
+        task_serializer.expander(includes)
+    )
+
+
 @bp.route('/', methods=['GET'])
-@role_required(['admin, staff'])
+@role_required(['admin', 'staff'])
 def list_tasks():
-    """List all tasks."""
-    tasks = Task.query.all()
-    return jsonify([{
-        "id": task.id,
-        "title": task.title,
-        "description": task.description,
-        "due_date": task.due_date,
-        "status": task.status,
-        "user_assigned": task.user_assigned
-    } for task in tasks]), 200
+    """List tasks, filtered by status, assignee and due date."""
+    return _task_list(Task.query)
+
+
+@bp.route('/mine', methods=['GET'])
+@role_required(['admin', 'staff'])
+def my_tasks():
+    """List the caller's tasks; only open ones unless ?status= says otherwise."""
+    user = current_identity()
+    return _task_list(Task.query.filter(Task.user_assigned == user['id']), OPEN_STATUSES)
 
 
 @bp.route('/<int:task_id>', methods=['GET'])
 @role_required(['admin', 'staff'])
 def get_task(task_id):
     """Retrieve a specific task."""
-    task = Task.query.get(task_id)
+    includes = task_serializer.requested_includes()
+    fields = task_serializer.requested(includes=includes)
+    task = task_serializer.select(Task.query, fields).filter(Task.id == task_id).first()
     if not task:
         return jsonify({"message": "Task not found"}), 404
 
-    return jsonify({
-        "id": task.id,
-        "title": task.title,
-        "description": task.description,
-        "due_date": task.due_date,
-        "status": task.status,
-        "user_assigned": task.user_assigned
-    }), 200
+    item = task_serializer.row_serializer(fields)(task)
+    return jsonify(task_serializer.expander(includes)([item])[0]), 200
 
 
 @bp.route('/<int:task_id>', methods=['PUT'])
@@ -86,12 +206,18 @@ def update_task(task_id):
     if not task:
         return jsonify({"message": "Task not found"}), 404
 
-    data = request.json
-    task.title = data.get('title', task.title)
-    task.description = data.get('description', task.description)
-    task.due_date = data.get('due_date', task.due_date)
-    task.status = data.get('status', task.status)
-    task.user_assigned = data.get('user_assigned', task.user_assigned)
+    try:
+        values = _task_values(request.json, partial=True)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+    if values.get('user_assigned') and _check_assigned_users({0: values}):
+        return jsonify({"message": "Assigned user not found"}), 404
+
+    assignee = task.user_assigned
+    for field, value in values.items():
+        setattr(task, field, value)
+    if task.user_assigned and task.user_assigned != assignee:
+        job_queue.enqueue('task_assigned', {"task_id": task.id, "user_id": task.user_assigned})
 
     db.session.commit()
     return jsonify({"message": "Task updated successfully"}), 200
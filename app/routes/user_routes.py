@@ -1,26 +1,23 @@
 from flask import Blueprint, request, jsonify
 from app.models import User, db
+from app.serializers import user_serializer
 from flask_jwt_extended import create_access_token
-from app.utils.auth_helpers import role_required
-from flask_jwt_extended import get_jwt_identity
-import json
+from app import idempotency, token_auth
+from app.utils.auth_helpers import current_identity, role_required
+from app.utils.pagination import list_response
 
 bp = Blueprint('user_routes', __name__)
 
 @bp.route('/register', methods=['POST'])
+@idempotency.idempotent
 def register():
     """
     Register a new user.
     - Customers can self-register without authentication.
     - Admins can register staff or admins if authenticated.
     """
-    # Check if the user is logged in (optional JWT)
-    current_user = None
-    if request.headers.get("Authorization"):
-        try:
-            current_user = get_jwt_identity()
-        except Exception:
-            pass  # Ignore errors if the request doesn't include a valid JWT
+    # Check if the user is logged in (optional JWT; invalid tokens are ignored)
+    current_user = current_identity(optional=True)
 
     data = request.json
     name = data.get('name')
@@ -64,25 +61,32 @@ def login():
     if not user or not user.check_password(password):
         return jsonify({"message": "Invalid credentials"}), 401
 
-    # Serialize the dictionary to a string for the identity field
-    token = create_access_token(identity=json.dumps({"id": user.id, "role": user.type}))
+    # Upgrade hashes created with older parameters while we know the password
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+
+    # The role travels as a claim so protected routes need no lookup
+    token = create_access_token(identity=str(user.id), additional_claims={"role": user.type})
     return jsonify({"access_token": token}), 200
 
+@bp.route('/logout', methods=['POST'])
+def logout():
+    """Revoke the access token used for this request."""
+    user = current_identity()
+    token_auth.revoke(user['jti'], user['exp'])
+    return jsonify({"message": "Logged out successfully"}), 200
+
 @bp.route('/', methods=['GET'])
 @role_required(['admin'])
 def list_users():
     """List all users (Admin Only)."""
-    users = User.query.all()  # Query all users from the database
-    return jsonify([{
-        "id": user.id,
-        "name": user.name,
-        "email": user.email,
-        "phone_number": user.phone_number,
-        "type": user.type
-    } for user in users]), 200
+    fields = user_serializer.requested()
+    return list_response(user_serializer.select(User.query, fields), User.id, user_serializer.row_serializer(fields))
 
 @bp.route('/create-staff', methods=['POST'])
 @role_required(['admin'])  # Restrict access to admin users
+@idempotency.idempotent
 def create_staff_user():
     """Allow admin to create a staff user."""
     data = request.json
@@ -0,0 +1,177 @@
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime, Time, select
+
+from app.models import Event, RateRule, Reservation, Room, Task, User
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class InvalidFields(ValueError):
+    """Raised when ``?fields=`` names a field the endpoint does not expose."""
+
+
+def encode_date(value):
+    return value.strftime('%Y-%m-%d') if value is not None else None
+
+
+def encode_time(value):
+    return value.strftime('%H:%M:%S') if value is not None else None
+
+
+def encode_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value is not None else None
+
+
+# Every date-like column is emitted in the same format the routes accept.
+ENCODERS_BY_TYPE = ((DateTime, encode_datetime), (Date, encode_date), (Time, encode_time))
+
+
+class Serializer:
+    """
+    Turns rows of ``model`` into JSON-ready dicts.
+
+    Queries are projected onto the selected columns with ``with_entities`` and
+    rows are built straight from the result tuples, so no ORM instances are
+    hydrated and unrequested columns are never read. ``?fields=a,b`` picks a
+    subset of ``fields``; the primary key is always included so keyset
+    pagination keeps working.
+    """
+
+    def __init__(self, model, fields, relations=None):
+        self.model = model
+        self.fields = tuple(fields)
+        # name -> (foreign key field, related serializer, related fields)
+        self.relations = relations or {}
+        self.columns = {name: getattr(model, name) for name in self.fields}
+        self.encoders = {}
+        for name, column in self.columns.items():
+            for column_type, encoder in ENCODERS_BY_TYPE:
+                if isinstance(column.type, column_type):
+                    self.encoders[name] = encoder
+                    break
+
+    def requested(self, default=None, includes=()):
+        """Return the fields selected by ``?fields=`` (``default`` or all otherwise)."""
+        raw = request.args.get('fields')
+        if not raw:
+            wanted = set(default or self.fields)
+        else:
+            wanted = {name.strip() for name in raw.split(',') if name.strip()}
+            unknown = sorted(wanted.difference(self.fields))
+            if unknown:
+                raise InvalidFields(f"Unknown field(s): {', '.join(unknown)}")
+        # Included relations are resolved through their foreign key column.
+        wanted.update(self.relations[name][0] for name in includes)
+        return tuple(name for name in self.fields if name in wanted or name == 'id')
+
+    def requested_includes(self):
+        """Return the relations named in ``?include=``."""
+        raw = request.args.get('include')
+        if not raw:
+            return ()
+        wanted = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = sorted(set(wanted).difference(self.relations))
+        if unknown:
+            raise InvalidFields(f"Unknown include(s): {', '.join(unknown)}")
+        return tuple(dict.fromkeys(wanted))
+
+    def expander(self, includes):
+        """
+        Return a function embedding ``includes`` into a batch of serialized rows.
+
+        Each relation costs exactly one ``IN`` query per batch (the same query
+        ``selectinload`` would issue), however many rows the batch holds.
+        """
+        def expand(items):
+            for name in includes:
+                foreign_key, related, related_fields = self.relations[name]
+                keys = {item[foreign_key] for item in items if item[foreign_key] is not None}
+                found = {}
+                if keys:
+                    serialize = related.row_serializer(related_fields)
+                    query = related.select(related.model.query, related_fields).filter(related.model.id.in_(keys))
+                    found = {row.id: serialize(row) for row in query}
+                for item in items:
+                    item[name] = found.get(item[foreign_key])
+            return items
+        return expand
+
+    def select(self, query, fields):
+        """Project ``query`` onto the columns backing ``fields``."""
+        return query.with_entities(*(self.columns[name] for name in fields))
+
+    def statement(self, fields):
+        """Return a Core ``SELECT`` of the columns backing ``fields``."""
+        return select(*(self.columns[name] for name in fields))
+
+    def row_serializer(self, fields):
+        """Return a function turning a result tuple of ``fields`` into a dict."""
+        encoders = tuple(self.encoders.get(name) for name in fields)
+        if not any(encoders):
+            return lambda row: dict(zip(fields, row))
+
+        def serialize(row):
+            return {
+                name: encode(value) if encode else value
+                for name, encode, value in zip(fields, encoders, row)
+            }
+        return serialize
+
+    def dump(self, obj, fields=None):
+        """Serialize an already loaded ORM instance."""
+        fields = fields or self.fields
+        return self.row_serializer(fields)(tuple(getattr(obj, name) for name in fields))
+
+
+user_serializer = Serializer(User, ('id', 'name', 'email', 'phone_number', 'type'))
+room_serializer = Serializer(
+    Room, ('id', 'name', 'description', 'square_meters', 'price_per_night', 'images_list')
+)
+rate_rule_serializer = Serializer(
+    RateRule, ('id', 'name', 'room_id', 'start_date', 'end_date', 'weekdays', 'price', 'multiplier', 'priority')
+)
+task_serializer = Serializer(
+    Task,
+    ('id', 'title', 'description', 'due_date', 'status', 'user_assigned'),
+    relations={'assigned_user': ('user_assigned', user_serializer, ('id', 'name'))}
+)
+event_serializer = Serializer(Event, ('id', 'title', 'description', 'date', 'time', 'location', 'image'))
+reservation_serializer = Serializer(
+    Reservation,
+    ('id', 'room_id', 'customer_id', 'nights', 'check_in', 'check_out', 'price'),
+    relations={
+        'room': ('room_id', room_serializer, room_serializer.fields),
+        # Only the guest's name: contact details stay behind /api/users
+        'customer': ('customer_id', user_serializer, ('id', 'name'))
+    }
+)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson when it is installed.
+
+    Falls back to the stdlib provider otherwise, and for any call using options
+    orjson does not support (e.g. ``indent``).
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -1,19 +1,153 @@
 
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from flask_jwt_extended.exceptions import JWTExtendedException, RevokedTokenError
+from jwt.exceptions import PyJWTError
+from blinker import Namespace
 from functools import wraps
-from flask import jsonify
+from flask import current_app, g, jsonify, request
+from app.utils.cache import LRUCache
 import json
+import threading
+import time
+
+_signals = Namespace()
+
+# Sent with reason='unauthenticated' (missing/invalid token) or 'forbidden'
+auth_failed = _signals.signal('auth-failed')
+
+# Raised for a missing, malformed, expired or revoked token; the JWT
+# extension's error handlers turn them into 401/422 responses.
+AUTH_ERRORS = (JWTExtendedException, PyJWTError)
+
+
+def identity_from_claims(claims):
+    """Build ``{"id", "role", "jti", "exp"}`` from decoded JWT claims."""
+    if 'role' in claims:
+        user_id, role = int(claims['sub']), claims['role']
+    else:
+        # Tokens issued before role/id became claims carry a JSON identity.
+        legacy = json.loads(claims['sub'])
+        user_id, role = legacy['id'], legacy['role']
+    return {"id": user_id, "role": role, "jti": claims.get('jti'), "exp": claims.get('exp')}
+
+
+class TokenAuth:
+    """
+    Single-pass JWT authentication with a verified-token cache and revocation.
+
+    The first request with a token verifies it once (signature, expiry,
+    revocation) and caches the resulting identity under the raw token in a
+    bounded LRU for at most ``AUTH_TOKEN_CACHE_TTL`` seconds, never past the
+    token's own expiry; later requests skip decoding entirely. Revoked token
+    ids are kept in the ``revoked_token`` table so every worker sees them, and
+    mirrored in an in-process dict, refreshed every ``AUTH_REVOCATION_REFRESH``
+    seconds, so each check is a single O(1) lookup.
+    """
+
+    def __init__(self, app=None):
+        self.tokens = None
+        self._revoked = {}  # jti -> exp
+        self._refreshed_at = None
+        self._seen_until = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.tokens = LRUCache(max_entries=app.config['AUTH_TOKEN_CACHE_SIZE'], ttl=app.config['AUTH_TOKEN_CACHE_TTL'])
+        app.extensions['token_auth'] = self
+        # Tokens that still go through full verification are checked too.
+        app.extensions['flask-jwt-extended'].token_in_blocklist_loader(
+            lambda jwt_header, jwt_data: self.is_revoked(jwt_data.get('jti'))
+        )
+
+    def authenticate(self):
+        """Return the caller's identity, raising the usual JWT errors if there is none."""
+        identity = g.get('identity')
+        if identity is not None:
+            return identity
+
+        token = _bearer_token()
+        identity = self.tokens.get(token) if token else None
+        if identity is None:
+            verify_jwt_in_request()
+            identity = identity_from_claims(get_jwt())
+            ttl = min(current_app.config['AUTH_TOKEN_CACHE_TTL'], (identity['exp'] or 0) - time.time())
+            if token and ttl > 0:
+                self.tokens.set(token, identity, ttl)
+        elif self.is_revoked(identity['jti']):
+            raise RevokedTokenError({}, {"jti": identity['jti']})
+
+        g.identity = identity
+        return identity
+
+    def is_revoked(self, jti):
+        if jti is None:
+            return False
+        if self._refreshed_at is None or \
+                time.monotonic() - self._refreshed_at >= current_app.config['AUTH_REVOCATION_REFRESH']:
+            self._refresh()
+        return jti in self._revoked
+
+    def revoke(self, jti, exp):
+        """Revoke token ``jti`` in every worker until it would have expired anyway."""
+        from app.models import RevokedToken, db
+
+        db.session.merge(RevokedToken(jti=jti, expires=exp, revoked_at=time.time()))
+        db.session.commit()
+        with self._lock:
+            self._revoked[jti] = exp
+
+    def _refresh(self):
+        from app.models import RevokedToken, db
+
+        with self._lock:
+            now = time.time()
+            # Overlap the previous window a little so concurrent commits are not missed.
+            rows = db.session.execute(
+                db.select(RevokedToken.jti, RevokedToken.expires, RevokedToken.revoked_at)
+                .where(RevokedToken.revoked_at >= self._seen_until - 5, RevokedToken.expires > now)
+            ).all()
+            revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            for jti, exp, revoked_at in rows:
+                revoked[jti] = exp
+                self._seen_until = max(self._seen_until, revoked_at)
+            self._revoked = revoked
+            self._refreshed_at = time.monotonic()
+
+
+def _bearer_token():
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    return token if scheme == 'Bearer' and token else None
+
+
+def current_identity(optional=False):
+    """
+    The caller's ``{"id", "role", "jti", "exp"}``. Without a valid token this
+    raises the JWT errors, or returns None when ``optional`` is set.
+    """
+    try:
+        return current_app.extensions['token_auth'].authenticate()
+    except AUTH_ERRORS:
+        if optional:
+            return None
+        raise
+
 
 def role_required(allowed_roles):
     """Decorator to check if the user's role is in allowed_roles."""
     def decorator(func):
         @wraps(func)
-        @jwt_required()
         def wrapper(*args, **kwargs):
-            # Deserialize the identity string into a dictionary
-            user = json.loads(get_jwt_identity())
+            try:
+                user = current_identity()
+            except AUTH_ERRORS:
+                auth_failed.send(current_app._get_current_object(), reason='unauthenticated')
+                raise
             if user["role"] not in allowed_roles:
+                auth_failed.send(current_app._get_current_object(), reason='forbidden')
                 return jsonify({"message": "Access forbidden: insufficient role"}), 403
             return func(*args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
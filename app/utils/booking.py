@@ -0,0 +1,129 @@
+import time
+
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+
+from app.models import Reservation, Room, db
+from app.utils.rollups import record_stay
+
+MAX_BOOKING_ATTEMPTS = 8
+RETRY_BACKOFF_SECONDS = 0.005
+
+
+class RoomNotFound(Exception):
+    """Raised when a booking targets a room that does not exist."""
+
+
+class BookingConflict(Exception):
+    """Raised when the requested stay overlaps an existing reservation."""
+
+    def __init__(self, reservation_id, check_in, check_out):
+        super().__init__(f"Overlaps reservation {reservation_id}")
+        self.reservation_id = reservation_id
+        self.check_in = check_in
+        self.check_out = check_out
+
+
+class BookingContention(Exception):
+    """Raised when a booking keeps losing the version race for its room."""
+
+
+def _locked_write(room_id, check_in, check_out, write, exclude=None):
+    """
+    Run ``write()`` and commit, unless the stay overlaps another reservation
+    of the room (other than ``exclude``).
+
+    Concurrent writes are serialized per room through an optimistic check on
+    ``Room.booking_version``: the write and the bump of the room's version go
+    in one transaction, and the bump only succeeds if no other booking for that
+    room committed in the meantime. Losers roll back and retry, so bookings for
+    different rooms never wait on each other.
+    """
+    for attempt in range(MAX_BOOKING_ATTEMPTS):
+        try:
+            version = db.session.query(Room.booking_version).filter_by(id=room_id).first()
+            if version is None:
+                db.session.rollback()
+                raise RoomNotFound(room_id)
+
+            overlapping = db.session.query(
+                Reservation.id, Reservation.check_in, Reservation.check_out
+            ).filter(
+                Reservation.room_id == room_id,
+                Reservation.overlaps(check_in, check_out)
+            )
+            if exclude is not None:
+                overlapping = overlapping.filter(Reservation.id != exclude)
+            conflict = overlapping.first()
+            if conflict:
+                db.session.rollback()
+                raise BookingConflict(*conflict)
+
+            result = write()
+            if result is None:
+                db.session.rollback()
+                return None
+            bumped = db.session.execute(
+                update(Room)
+                .where(Room.id == room_id, Room.booking_version == version.booking_version)
+                .values(booking_version=Room.booking_version + 1)
+            ).rowcount
+            if bumped == 1:
+                db.session.commit()
+                return result
+            db.session.rollback()
+        except OperationalError:
+            # SQLite reports a lost write race as "database is locked"; treat it
+            # like a version mismatch.
+            db.session.rollback()
+        time.sleep(RETRY_BACKOFF_SECONDS * (attempt + 1))
+    raise BookingContention(room_id)
+
+
+def book_room(room_id, customer_id, nights, check_in, check_out, price, on_booked=None):
+    """
+    Atomically create a reservation unless it overlaps another one for the room.
+
+    ``on_booked(reservation)`` runs inside the booking transaction (e.g. to
+    enqueue follow-up jobs), so its writes commit only with the reservation.
+    """
+    def write():
+        reservation = Reservation(
+            room_id=room_id,
+            customer_id=customer_id,
+            nights=nights,
+            check_in=check_in,
+            check_out=check_out,
+            price=price
+        )
+        db.session.add(reservation)
+        record_stay(room_id, check_in, check_out, price)
+        if on_booked is not None:
+            db.session.flush()
+            on_booked(reservation)
+        return reservation
+
+    return _locked_write(room_id, check_in, check_out, write)
+
+
+def move_booking(reservation_id, room_id, check_in, check_out, nights, price):
+    """
+    Atomically move a reservation to ``room_id`` and the new dates, under the
+    same overlap check and version bump as :func:`book_room` (the reservation
+    does not conflict with itself). Returns None if it no longer exists.
+    """
+    def write():
+        reservation = db.session.get(Reservation, reservation_id)
+        if reservation is None:
+            return None
+        # Move the stay in the rollups along with the reservation
+        record_stay(reservation.room_id, reservation.check_in, reservation.check_out, reservation.price, sign=-1)
+        reservation.room_id = room_id
+        reservation.nights = nights
+        reservation.check_in = check_in
+        reservation.check_out = check_out
+        reservation.price = price
+        record_stay(room_id, check_in, check_out, price)
+        return reservation
+
+    return _locked_write(room_id, check_in, check_out, write, exclude=reservation_id)
@@ -0,0 +1,87 @@
+from flask import current_app, jsonify, request
+from sqlalchemy import insert, select, update
+
+from app.models import db
+
+
+def bulk_write(model, parse, check=None, after_commit=None, on_write=None):
+    """
+    Validate and write an array of ``model`` rows in one transaction.
+
+    ``POST`` inserts every item; ``PUT`` updates existing rows by ``id`` with
+    only the fields each item provides. The body is either a JSON array or
+    ``{"items": [...]}``. ``parse(item, partial)`` returns column values or
+    raises ``ValueError``; ``check(rows)`` may validate the parsed rows as a
+    batch (e.g. foreign keys with one ``IN`` query) and returns
+    ``{index: message}``. Writes use a single executemany statement.
+    ``on_write(rows)`` runs in the same transaction (e.g. to enqueue jobs):
+    after an INSERT, with each row's new ``id`` filled in, or before an UPDATE,
+    so it can still read the rows' previous values.
+
+    ``?mode=atomic`` (default) writes nothing if any item is invalid;
+    ``?mode=partial`` writes the valid items and answers 207 with the errors.
+    """
+    mode = request.args.get('mode', 'atomic')
+    if mode not in ('atomic', 'partial'):
+        return jsonify({"message": "Invalid mode. Use 'atomic' or 'partial'"}), 400
+
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"message": "Expected a non-empty array of items"}), 400
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify({"message": f"At most {current_app.config['BULK_MAX_ITEMS']} items per request"}), 413
+
+    partial = request.method == 'PUT'
+    errors = {}
+    rows = {}
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Item must be an object")
+            values = parse(item, partial)
+            if partial:
+                if not isinstance(item.get('id'), int):
+                    raise ValueError("Missing id")
+                values['id'] = item['id']
+            rows[index] = values
+        except ValueError as error:
+            errors[index] = str(error)
+
+    if partial and rows:
+        ids = {values['id'] for values in rows.values()}
+        existing = set(db.session.scalars(select(model.id).where(model.id.in_(ids))))
+        for index, values in list(rows.items()):
+            if values['id'] not in existing:
+                errors[index] = "Not found"
+                del rows[index]
+    if check and rows:
+        for index, message in check(rows).items():
+            errors[index] = message
+            del rows[index]
+
+    error_list = [{"index": index, "message": message} for index, message in sorted(errors.items())]
+    if errors and mode == 'atomic':
+        return jsonify({"message": "Validation failed, nothing was written", "errors": error_list}), 400
+
+    if rows:
+        values = list(rows.values())
+        if partial:
+            if on_write:
+                on_write(values)
+            db.session.execute(update(model), values)
+        elif on_write:
+            ids = db.session.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), values)
+            for row, row_id in zip(values, ids):
+                row['id'] = row_id
+            on_write(values)
+        else:
+            db.session.execute(insert(model), values)
+        db.session.commit()
+        if after_commit:
+            after_commit()
+
+    written = {"updated" if partial else "created": len(rows), "errors": error_list}
+    if errors:
+        return jsonify(written), 207
+    return jsonify(written), 200 if partial else 201
@@ -0,0 +1,221 @@
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
+from functools import wraps
+
+from flask import Response, current_app, make_response, request
+from werkzeug.utils import import_string
+
+from app.utils.pagination import wants_stream
+
+
+class CacheBackend:
+    """
+    Storage interface for :class:`ResponseCache`.
+
+    The default :class:`LRUCache` lives inside one worker process. A backend
+    shared by all gunicorn workers (Redis, memcached, ...) only has to implement
+    these methods for invalidations to become visible everywhere; ``incr`` must
+    be atomic across processes.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def add(self, key, value, ttl=None):
+        """Set ``key`` only if it is absent (atomically); return whether it was set."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def incr(self, key):
+        """Atomically increment the counter ``key`` and return its new value."""
+        raise NotImplementedError
+
+    def counter(self, key):
+        """Return the current value of counter ``key`` (0 if never incremented)."""
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # Counters are tiny and must never be evicted, so they live apart.
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._put(key, value, ttl)
+
+    def _put(self, key, value, ttl):
+        # Caller holds the lock
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (value, time.monotonic() + ttl if ttl else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def add(self, key, value, ttl=None):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and (item[1] is None or item[1] > time.monotonic()):
+                return False
+            self._put(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._counters.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+
+def default_backend(config):
+    """Build the in-process LRU backend from the app config."""
+    return LRUCache(max_entries=config['RESPONSE_CACHE_MAX_ENTRIES'], ttl=config['RESPONSE_CACHE_TTL'])
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Return a 304 response if the request's ``If-None-Match`` (or, without one,
+    ``If-Modified-Since``) already matches ``etag`` / ``last_modified`` (naive
+    UTC), else None. Lets an endpoint answer revalidations from a cheap
+    validator query without building the body.
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains(etag)
+    elif last_modified is not None and request.if_modified_since is not None:
+        matched = last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    response = Response(status=304)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """Attach ``etag``/``last_modified`` and ask clients to revalidate on every use."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+class ResponseCache:
+    """
+    Response cache for public, read-mostly GET endpoints.
+
+    Responses are stored per namespace (``'rooms'``, ``'events'``) under a
+    generation number; :meth:`invalidate` bumps the generation so every cached
+    page of that namespace is dropped at once. Each cached body carries a strong
+    ETag, and ``If-None-Match`` revalidations are answered with 304 without
+    touching the database.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        factory = app.config['RESPONSE_CACHE_BACKEND'] or default_backend
+        if isinstance(factory, str):
+            factory = import_string(factory)
+        app.extensions['response_cache'] = factory(app.config)
+
+    @property
+    def backend(self):
+        return current_app.extensions['response_cache']
+
+    def generation(self, namespace):
+        """Current generation of ``namespace``; changes on every :meth:`invalidate`."""
+        return self.backend.counter(f'gen:{namespace}')
+
+    def invalidate(self, namespace):
+        """Drop every cached response in ``namespace``."""
+        self.backend.incr(f'gen:{namespace}')
+
+    def _lookup(self, namespace):
+        key = f'resp:{namespace}:{self.generation(namespace)}:{request.full_path}'
+        entry = self.backend.get(key)
+        if entry is None:
+            return key, None
+        body, mimetype, etag = entry
+        response = Response(body, status=200, mimetype=mimetype)
+        response.set_etag(etag)
+        return key, response
+
+    def _store(self, key, rv):
+        response = make_response(rv)
+        if response.status_code != 200 or response.is_streamed:
+            return response
+        body = response.get_data()
+        etag = hashlib.sha256(body).hexdigest()
+        response.set_etag(etag)
+        self.backend.set(key, (body, response.mimetype, etag))
+        return self._finish(response)
+
+    @staticmethod
+    def _finish(response):
+        # Let clients keep the body but revalidate on every use.
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    def cached(self, namespace):
+        """Cache successful GET responses of the decorated view (sync or async) under ``namespace``."""
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if request.method != 'GET' or wants_stream():
+                        return await func(*args, **kwargs)
+                    key, response = self._lookup(namespace)
+                    if response is not None:
+                        return self._finish(response)
+                    return self._store(key, await func(*args, **kwargs))
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or wants_stream():
+                    return func(*args, **kwargs)
+                key, response = self._lookup(namespace)
+                if response is not None:
+                    return self._finish(response)
+                return self._store(key, func(*args, **kwargs))
+            return wrapper
+        return decorator
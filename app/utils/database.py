@@ -0,0 +1,77 @@
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from app.utils.metrics import TimedQueuePool
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the queries of read-only requests to the replica.
+
+    When a ``replica`` bind is configured, everything executed while handling a
+    GET/HEAD request uses the read-only engine; any other request, flushes, and
+    work outside a request (CLI, workers) stay on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and request.method in READ_METHODS:
+            engines = self._db.engines
+            if REPLICA_BIND in engines:
+                return engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_memory_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def configure_engines(app):
+    """Derive SQLALCHEMY_ENGINE_OPTIONS and the replica bind from the DB_* settings."""
+    config = app.config
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_pre_ping', config['DB_POOL_PRE_PING'])
+    options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+    # In-memory SQLite runs on a StaticPool, which has no size or overflow.
+    if not _is_memory_sqlite(config['SQLALCHEMY_DATABASE_URI']):
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+        if config['METRICS_ENABLED']:
+            options.setdefault('poolclass', TimedQueuePool)
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    if config['SQLALCHEMY_REPLICA_URI']:
+        binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+        binds[REPLICA_BIND] = config['SQLALCHEMY_REPLICA_URI']
+        config['SQLALCHEMY_BINDS'] = binds
+
+
+def install_sqlite_pragmas(app, db):
+    """Apply SQLITE_PRAGMAS to every new connection of each SQLite engine."""
+    pragmas = app.config['SQLITE_PRAGMAS']
+    with app.app_context():
+        engines = db.engines
+    for bind_key, engine in engines.items():
+        if engine.dialect.name != 'sqlite':
+            continue
+        # The replica is opened read-only and cannot switch journal modes.
+        bind_pragmas = {
+            name: value for name, value in pragmas.items()
+            if not (bind_key == REPLICA_BIND and name == 'journal_mode')
+        }
+        event.listen(engine, 'connect', sqlite_pragma_setter(bind_pragmas))
+
+
+def sqlite_pragma_setter(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
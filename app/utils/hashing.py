@@ -0,0 +1,93 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import current_app, jsonify
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingOverloaded(Exception):
+    """Raised when too many password hashes are already queued, or one takes too long."""
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification on a bounded executor.
+
+    ``PASSWORD_HASH_WORKERS`` threads (or processes, with
+    ``PASSWORD_HASH_EXECUTOR = 'process'``) do the key derivation, and at most
+    ``PASSWORD_HASH_QUEUE_DEPTH`` further jobs may wait for them. Past that,
+    callers fail fast with :class:`HashingOverloaded` (HTTP 503) instead of
+    tying up request workers, so a login burst cannot starve the other routes.
+    A job still running after ``PASSWORD_HASH_TIMEOUT`` also answers 503; its
+    slot stays taken until the job actually finishes.
+    ``PASSWORD_HASH_WORKERS = 0`` hashes inline on the calling thread.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.register_error_handler(HashingOverloaded, self._overloaded)
+
+    @staticmethod
+    def _overloaded(error):
+        return jsonify({"message": "Server busy, please retry"}), 503, {"Retry-After": "1"}
+
+    def _get_executor(self, config):
+        # Created lazily, and again after a fork, so every gunicorn worker owns
+        # its own pool.
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                workers = config['PASSWORD_HASH_WORKERS']
+                if config['PASSWORD_HASH_EXECUTOR'] == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers=workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pwhash')
+                self._slots = threading.BoundedSemaphore(workers + config['PASSWORD_HASH_QUEUE_DEPTH'])
+                self._pid = os.getpid()
+            return self._executor, self._slots
+
+    def _run(self, func, *args):
+        config = current_app.config
+        if not config['PASSWORD_HASH_WORKERS']:
+            return func(*args)
+
+        executor, slots = self._get_executor(config)
+        if not slots.acquire(blocking=False):
+            raise HashingOverloaded()
+        try:
+            future = executor.submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # Freed when the job ends, not when this caller stops waiting for it
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=config['PASSWORD_HASH_TIMEOUT'])
+        except FutureTimeout:
+            raise HashingOverloaded() from None
+
+    def hash(self, password):
+        """Hash ``password`` with the configured method."""
+        config = current_app.config
+        return self._run(
+            generate_password_hash, password,
+            config['PASSWORD_HASH_METHOD'], config['PASSWORD_HASH_SALT_LENGTH']
+        )
+
+    def verify(self, password_hash, password):
+        """Check ``password`` against a stored hash."""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if ``password_hash`` was produced with different parameters."""
+        config = current_app.config
+        method, _, rest = password_hash.partition('$')
+        salt = rest.partition('$')[0]
+        return method != config['PASSWORD_HASH_METHOD'] or len(salt) != config['PASSWORD_HASH_SALT_LENGTH']
@@ -0,0 +1,70 @@
+from datetime import datetime
+from itertools import islice
+
+from flask import Response, current_app, stream_with_context
+
+ICAL_MIMETYPE = 'text/calendar'
+PRODID = '-//Hotel API//Events//EN'
+UID_DOMAIN = 'hotel-api'
+
+
+def escape(value):
+    """Escape a TEXT value (RFC 5545 3.3.11)."""
+    return (
+        (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line into chunks of at most 75 octets, continued with CRLF + space."""
+    if len(line.encode()) <= 75:
+        return line + '\r\n'
+    chunks, chunk, size = [], '', 0
+    for char in line:
+        width = len(char.encode())
+        # Continuation lines start with a space, which counts towards their 75.
+        if size + width > (75 if not chunks else 74):
+            chunks.append(chunk)
+            chunk, size = '', 0
+        chunk += char
+        size += width
+    chunks.append(chunk)
+    return '\r\n '.join(chunks) + '\r\n'
+
+
+def vevent(event_id, title, description, date, time, location, updated_at):
+    """Render one event; the start is a floating (hotel local) time."""
+    start = datetime.combine(date, time)
+    return ''.join(fold(line) for line in (
+        'BEGIN:VEVENT',
+        f'UID:event-{event_id}@{UID_DOMAIN}',
+        f'DTSTAMP:{updated_at:%Y%m%dT%H%M%S}Z',
+        f'DTSTART:{start:%Y%m%dT%H%M%S}',
+        f'SUMMARY:{escape(title)}',
+        f'DESCRIPTION:{escape(description)}',
+        f'LOCATION:{escape(location)}',
+        'END:VEVENT',
+    ))
+
+
+def calendar_response(query, name):
+    """
+    Stream ``query`` rows of (id, title, description, date, time, location,
+    updated_at) as an iCalendar feed, encoding one event at a time so memory
+    stays flat however many events the window holds.
+    """
+    batch_size = current_app.config['STREAM_BATCH_SIZE']
+    rows = query.yield_per(batch_size)
+
+    def generate():
+        yield ''.join(fold(line) for line in (
+            'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN',
+            f'X-WR-CALNAME:{escape(name)}',
+        ))
+        cursor = iter(rows)
+        for batch in iter(lambda: list(islice(cursor, batch_size)), []):
+            yield ''.join(vevent(*row) for row in batch)
+        yield 'END:VCALENDAR\r\n'
+
+    return Response(stream_with_context(generate()), mimetype=ICAL_MIMETYPE)
@@ -0,0 +1,186 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, jsonify, make_response, request
+from werkzeug.utils import import_string
+
+from app.utils.cache import LRUCache
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.05
+# Recomputed on replay, or tied to the original connection
+SKIPPED_HEADERS = {'content-length', 'set-cookie', 'server-timing'}
+
+
+class ClaimingLRUCache(LRUCache):
+    """
+    :class:`LRUCache` whose ``add`` claims live outside the LRU order until
+    they are replaced by ``set``, deleted or expire, so a burst of new keys
+    can never evict a request that is still running.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None):
+        super().__init__(max_entries, ttl)
+        self._claims = {}
+
+    def _claim(self, key):
+        # Caller holds the lock
+        item = self._claims.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del self._claims[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._claim(key)
+        return item[0] if item is not None else super().get(key)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._claims.pop(key, None)
+            self._put(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._claim(key) is not None or (
+                entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+            ):
+                return False
+            ttl = self.ttl if ttl is None else ttl
+            self._claims[key] = (value, time.monotonic() + ttl if ttl else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._claims.pop(key, None)
+            self._entries.pop(key, None)
+
+
+def default_backend(config):
+    """Build the in-process LRU backend from the app config."""
+    return ClaimingLRUCache(max_entries=config['IDEMPOTENCY_MAX_KEYS'], ttl=config['IDEMPOTENCY_TTL'])
+
+
+def scope():
+    """Whose keys these are: the Authorization header, or the client address for anonymous requests."""
+    credentials = request.headers.get('Authorization')
+    owner = f'auth:{credentials}' if credentials else f'addr:{request.remote_addr}'
+    return hashlib.sha256(owner.encode()).hexdigest()
+
+
+def fingerprint():
+    """Hash of what makes a request the same request: method, path with query, and body."""
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.full_path.encode(), request.get_data()):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class Idempotency:
+    """
+    ``Idempotency-Key`` support for POST endpoints that create rows.
+
+    The first request with a key claims it in the backend with an atomic
+    ``add``, runs the view and stores the response (anything below 500)
+    together with a fingerprint of the request for ``IDEMPOTENCY_TTL``
+    seconds. A retry with the same key and fingerprint gets the stored
+    response replayed (marked ``Idempotent-Replayed: true``) without running
+    the view; a duplicate arriving while the first is still running waits for
+    it, up to ``IDEMPOTENCY_WAIT_SECONDS``, then gets 409. Reusing a key for a
+    different request is a 422. Keys are scoped by the Authorization header
+    (by client address for anonymous requests), so two clients cannot replay
+    each other's responses.
+
+    The default in-process backend only sees one worker; with
+    ``IDEMPOTENCY_BACKEND`` pointing at a shared :class:`CacheBackend`, keys
+    hold across workers (waiters in other workers poll).
+    """
+
+    def __init__(self, app=None):
+        self._inflight = {}  # store key -> Event set when its first execution finishes
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        factory = app.config['IDEMPOTENCY_BACKEND'] or default_backend
+        if isinstance(factory, str):
+            factory = import_string(factory)
+        app.extensions['idempotency'] = factory(app.config)
+
+    @property
+    def backend(self):
+        return current_app.extensions['idempotency']
+
+    def idempotent(self, func):
+        """Honour ``Idempotency-Key`` on the decorated view; requests without it run as usual."""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return func(*args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return jsonify({"message": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"}), 400
+
+            store_key = f'idem:{scope()}:{key}'
+            request_hash = fingerprint()
+            config = current_app.config
+            deadline = time.monotonic() + config['IDEMPOTENCY_WAIT_SECONDS']
+
+            while True:
+                entry = self.backend.get(store_key)
+                if entry is None:
+                    if self.backend.add(store_key, ('pending', request_hash), ttl=config['IDEMPOTENCY_LOCK_SECONDS']):
+                        return self._execute(store_key, request_hash, func, args, kwargs)
+                    continue  # lost the claim to a concurrent duplicate
+                if entry[1] != request_hash:
+                    return jsonify({"message": f"{HEADER} was already used for a different request"}), 422
+                if entry[0] == 'done':
+                    return self._replay(entry)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return jsonify({"message": "A request with this Idempotency-Key is still in progress"}), \
+                        409, {"Retry-After": "1"}
+                event = self._inflight.get(store_key)
+                if event is not None:
+                    event.wait(remaining)
+                else:
+                    time.sleep(min(POLL_SECONDS, remaining))
+        return wrapper
+
+    def _execute(self, store_key, request_hash, func, args, kwargs):
+        """Run the view as the owner of ``store_key`` and store its response."""
+        event = threading.Event()
+        with self._lock:
+            self._inflight[store_key] = event
+        try:
+            response = make_response(func(*args, **kwargs))
+            if response.status_code < 500 and not response.is_streamed:
+                headers = [(name, value) for name, value in response.headers
+                           if name.lower() not in SKIPPED_HEADERS]
+                self.backend.set(store_key, ('done', request_hash, response.status_code,
+                                             response.get_data(), headers))
+            else:
+                self.backend.delete(store_key)  # let the retry run again
+            return response
+        except BaseException:
+            self.backend.delete(store_key)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(store_key, None)
+            event.set()
+
+    @staticmethod
+    def _replay(entry):
+        _, _, status, body, headers = entry
+        response = Response(body, status=status, headers=headers)
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
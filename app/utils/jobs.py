@@ -0,0 +1,171 @@
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, insert, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.utils.notify import init_notifier
+
+jobs_cli = AppGroup('jobs', help='Run background jobs.')
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    Database-backed background jobs.
+
+    :meth:`enqueue` inserts a ``job`` row in the caller's transaction, so the
+    job commits or rolls back with the write that caused it and a request only
+    pays for one INSERT. The worker (``worker.py`` or ``flask jobs work``)
+    claims due jobs in batches with one UPDATE, runs their handlers, and
+    retries failures with exponential backoff and jitter; after
+    ``JOBS_MAX_ATTEMPTS`` a job stays ``failed``. A job whose worker died is
+    claimed again when its ``JOBS_LEASE_SECONDS`` lease runs out, so handlers
+    must be idempotent. Handlers registered with ``every=`` are enqueued once
+    per interval by whichever worker gets there first.
+    """
+
+    def __init__(self, app=None):
+        self.handlers = {}  # name -> function(**payload)
+        self.periodic = {}  # name -> seconds, or the config key holding them
+        self._scheduled = {}  # name -> last slot this process queued
+        self.stopping = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['job_queue'] = self
+        init_notifier(app)
+
+    def handler(self, name, every=None):
+        """Register the decorated function as the handler of jobs called ``name``."""
+        def decorator(func):
+            self.handlers[name] = func
+            if every is not None:
+                self.periodic[name] = every
+            return func
+        return decorator
+
+    def enqueue(self, name, payload=None, run_at=None, key=None):
+        """
+        Queue job ``name`` in the current transaction, to run at ``run_at``
+        (naive UTC, default now). With ``key``, nothing is queued if a job with
+        that key already exists.
+        """
+        if name not in self.handlers:
+            raise LookupError(f"No handler for job {name!r}")
+        from app.models import Job, db, utcnow
+
+        values = {
+            "name": name, "payload": payload or {}, "key": key, "status": 'queued', "attempts": 0,
+            "max_attempts": current_app.config['JOBS_MAX_ATTEMPTS'], "run_at": run_at or utcnow(),
+            "created_at": utcnow(),
+        }
+        statement = insert(Job)
+        if key is not None:
+            dialect = db.session.get_bind().dialect.name
+            statement = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(Job)
+            statement = statement.on_conflict_do_nothing(index_elements=['key'])
+        db.session.execute(statement.values(**values))
+
+    # Worker side
+
+    def schedule(self):
+        """Queue the current run of every periodic job (once, whichever worker gets here first)."""
+        from app.models import db
+
+        now = time.time()
+        for name, every in self.periodic.items():
+            if isinstance(every, str):
+                every = current_app.config[every]
+            slot = int(now // every * every)
+            if self._scheduled.get(name) != slot:
+                self.enqueue(name, {"slot": slot}, key=f'{name}:{slot}')
+                self._scheduled[name] = slot
+        db.session.commit()
+
+    def claim(self, limit):
+        """Lease up to ``limit`` due jobs to this worker and return them."""
+        from app.models import Job, db, utcnow
+
+        now = utcnow()
+        due = (
+            db.select(Job.id)
+            .where(or_(
+                and_(Job.status == 'queued', Job.run_at <= now),
+                and_(Job.status == 'running', Job.locked_until < now),
+            ))
+            .order_by(Job.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id.in_(due.scalar_subquery()))
+            .values(status='running', attempts=Job.attempts + 1,
+                    locked_until=now + timedelta(seconds=current_app.config['JOBS_LEASE_SECONDS']))
+            .returning(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.session.commit()
+        return claimed
+
+    def backoff(self, attempts):
+        """Seconds before retry number ``attempts``: exponential, capped, with jitter."""
+        config = current_app.config
+        delay = min(config['JOBS_BACKOFF_BASE'] * 2 ** (attempts - 1), config['JOBS_BACKOFF_MAX'])
+        return delay * random.uniform(0.5, 1.0)
+
+    def run(self, job):
+        """Run one claimed job and record the outcome."""
+        from app.models import Job, db, utcnow
+
+        try:
+            self.handlers[job.name](**job.payload)
+            db.session.commit()
+            values = {"status": 'done', "last_error": None, "finished_at": utcnow()}
+        except Exception as error:
+            db.session.rollback()
+            logger.exception("Job %s (%s) failed on attempt %d", job.id, job.name, job.attempts)
+            values = {"last_error": f'{type(error).__name__}: {error}'[:2000]}
+            if job.attempts >= job.max_attempts:
+                values.update(status='failed', finished_at=utcnow())
+            else:
+                values.update(status='queued', run_at=utcnow() + timedelta(seconds=self.backoff(job.attempts)))
+        db.session.execute(update(Job).where(Job.id == job.id).values(locked_until=None, **values))
+        db.session.commit()
+
+    def run_pending(self):
+        """Schedule periodic jobs, then claim and run one batch. Returns how many jobs ran."""
+        self.schedule()
+        claimed = self.claim(current_app.config['JOBS_BATCH_SIZE'])
+        for job in claimed:
+            self.run(job)
+        return len(claimed)
+
+    def work(self, app, once=False):
+        """Process jobs until :meth:`stop` is called (or one batch with ``once``)."""
+        while not self.stopping.is_set():
+            with app.app_context():
+                ran = self.run_pending()
+            if once:
+                return
+            if not ran:
+                self.stopping.wait(app.config['JOBS_POLL_INTERVAL'])
+
+    def stop(self):
+        """Finish the job in progress, then return from :meth:`work`."""
+        self.stopping.set()
+
+
+@jobs_cli.command('work')
+@click.option('--once', is_flag=True, help='Run one batch of due jobs and exit.')
+def work(once):
+    """Run background jobs in the foreground."""
+    current_app.extensions['job_queue'].work(current_app._get_current_object(), once=once)
@@ -0,0 +1,270 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from flask import Response, g, request
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.utils.auth_helpers import auth_failed
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# name -> (type, help)
+METRICS = {
+    'hotel_http_requests_total': ('counter', 'Requests handled, by endpoint and status code.'),
+    'hotel_http_request_duration_seconds': ('histogram', 'Request latency in seconds, by endpoint.'),
+    'hotel_http_requests_in_flight': ('gauge', 'Requests currently being handled, by blueprint.'),
+    'hotel_db_pool_checkout_seconds': ('histogram', 'Time spent getting a connection from the pool, by bind.'),
+    'hotel_auth_failures_total': ('counter', 'Requests rejected by role_required, by endpoint and reason.'),
+}
+
+
+class _TimedCheckout:
+    """Pool mixin reporting how long every checkout took to :attr:`observer`."""
+
+    bind_key = 'default'
+    observer = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if _TimedCheckout.observer is not None:
+                _TimedCheckout.observer(self.bind_key, time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.bind_key = self.bind_key
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _merge(into, shard):
+    """Add the values of ``shard`` onto ``into`` (histograms element-wise)."""
+    for key, value in shard.items():
+        if isinstance(value, list):
+            target = into.setdefault(key, [0] * len(value))
+            for index, item in enumerate(value):
+                target[index] += item
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}' if pairs else ''
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Metrics:
+    """
+    Prometheus metrics for every request, exported on ``METRICS_PATH``.
+
+    Each thread records into its own dict, so the request path takes no lock;
+    a scrape sums the per-thread shards. With ``METRICS_DIR`` set, every
+    worker process also flushes its totals to ``<dir>/metrics-<pid>.json``
+    (every ``METRICS_FLUSH_INTERVAL`` seconds and on scrape) and a scrape served
+    by any worker merges all files, so gunicorn workers report as one
+    application. Counters of exited workers are kept; their gauges are not.
+    Clear the directory on deploy.
+    """
+
+    def __init__(self, app=None):
+        self.buckets = ()
+        self.directory = None
+        self.flush_interval = 5
+        self._local = threading.local()
+        self._lock = threading.Lock()  # guards the list of shards, not the shards
+        self._shards = []
+        self._retired = {}
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config['METRICS_ENABLED']:
+            return
+        self.buckets = tuple(sorted(app.config['METRICS_BUCKETS']))
+        self.directory = app.config['METRICS_DIR']
+        self.flush_interval = app.config['METRICS_FLUSH_INTERVAL']
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            atexit.register(self._flush)
+
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+        app.add_url_rule(app.config['METRICS_PATH'], 'metrics', self.export)
+        auth_failed.connect(self._auth_failed, app, weak=False)
+
+        # Name the pools created by configure_engines so wait times carry their bind.
+        _TimedCheckout.observer = self._pool_checkout
+        with app.app_context():
+            engines = app.extensions['sqlalchemy'].engines
+        for bind_key, engine in engines.items():
+            engine.pool.bind_key = bind_key or 'default'
+
+    # Recording
+
+    def _shard(self):
+        if self._pid != os.getpid():
+            # First use, or first use after a fork: start from empty totals.
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._shards, self._retired = [], {}
+                    self._local = threading.local()
+                    self._pid = os.getpid()
+                    if self.directory:
+                        threading.Thread(target=self._flush_forever, name='metrics-flush', daemon=True).start()
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+
+    def inc(self, name, labels=(), amount=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        shard = self._shard()
+        key = (name, labels)
+        histogram = shard.get(key)
+        if histogram is None:
+            # One count per bucket plus +Inf, then the sum of observations.
+            histogram = shard[key] = [0] * (len(self.buckets) + 2)
+        histogram[bisect_left(self.buckets, value)] += 1
+        histogram[-1] += value
+
+    def _start_request(self):
+        if request.endpoint == 'metrics':
+            return
+        g.metrics_started = time.perf_counter()
+        g.metrics_blueprint = request.blueprint or ''
+        self.inc('hotel_http_requests_in_flight', (('blueprint', g.metrics_blueprint),))
+
+    def _record_status(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _finish_request(self, error):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        endpoint = (('blueprint', g.metrics_blueprint), ('endpoint', request.endpoint or 'unmatched'),
+                    ('method', request.method))
+        self.inc('hotel_http_requests_in_flight', (('blueprint', g.metrics_blueprint),), -1)
+        self.inc('hotel_http_requests_total', endpoint + (('status', str(g.pop('metrics_status', 500))),))
+        self.observe('hotel_http_request_duration_seconds', endpoint, elapsed)
+
+    def _pool_checkout(self, bind_key, seconds):
+        self.observe('hotel_db_pool_checkout_seconds', (('bind', bind_key),), seconds)
+
+    def _auth_failed(self, app, reason):
+        self.inc('hotel_auth_failures_total', (('endpoint', request.endpoint or 'unmatched'), ('reason', reason)))
+
+    # Aggregation
+
+    def snapshot(self):
+        """Totals of this process, summed over all thread shards."""
+        with self._lock:
+            live = []
+            for thread_ref, shard in self._shards:
+                thread = thread_ref()
+                if thread is None or not thread.is_alive():
+                    _merge(self._retired, shard)  # fold finished threads away
+                else:
+                    live.append((thread_ref, shard))
+            self._shards = live
+            totals = {}
+            _merge(totals, self._retired)
+            for _, shard in live:
+                _merge(totals, dict(shard))
+        return totals
+
+    def _flush(self):
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        rows = [[name, [list(pair) for pair in labels], value] for (name, labels), value in self.snapshot().items()]
+        with open(path + '.tmp', 'w') as output:
+            json.dump(rows, output)
+        os.replace(path + '.tmp', path)
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self._flush()
+
+    def _collect(self):
+        """Merge the flushed totals of every worker process."""
+        self._flush()
+        totals = {}
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+            alive = _pid_alive(pid)
+            try:
+                with open(path) as source:
+                    rows = json.load(source)
+            except (OSError, ValueError):
+                continue
+            _merge(totals, {
+                (name, tuple(tuple(pair) for pair in labels)): value
+                for name, labels, value in rows
+                if alive or METRICS[name][0] != 'gauge'
+            })
+        return totals
+
+    # Exposition
+
+    def render(self, totals):
+        by_name = {}
+        for (name, labels), value in totals.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(by_name.get(name, ())):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {value}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), value[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", bound),))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {value[-1]}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        """Serve all metrics in the Prometheus text format."""
+        totals = self._collect() if self.directory else self.snapshot()
+        return Response(self.render(totals), content_type=CONTENT_TYPE)
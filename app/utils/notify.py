@@ -0,0 +1,43 @@
+import logging
+from collections import deque
+
+from flask import current_app
+from werkzeug.utils import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Notifier:
+    """
+    Delivery channel used by the background jobs.
+
+    A real channel (SMTP, SMS gateway, push service) only has to implement
+    :meth:`send`. It is only ever called from worker.py, never while a request
+    is being served.
+    """
+
+    def send(self, recipient, subject, body):
+        raise NotImplementedError
+
+
+class StubNotifier(Notifier):
+    """Logs every message and keeps the last ``keep`` in :attr:`outbox` instead of delivering it."""
+
+    def __init__(self, keep=1000):
+        self.outbox = deque(maxlen=keep)
+
+    def send(self, recipient, subject, body):
+        logger.info("Notification to %s: %s", recipient, subject)
+        self.outbox.append({"recipient": recipient, "subject": subject, "body": body})
+
+
+def init_notifier(app):
+    """Build the ``NOTIFIER`` factory (an import path taking the app config), or the stub."""
+    factory = app.config['NOTIFIER'] or (lambda config: StubNotifier())
+    if isinstance(factory, str):
+        factory = import_string(factory)
+    app.extensions['notifier'] = factory(app.config)
+
+
+def notifier():
+    return current_app.extensions['notifier']
@@ -0,0 +1,147 @@
+import math
+from array import array
+from datetime import date, timedelta
+from itertools import accumulate
+
+from flask import current_app
+
+from app.utils.cache import LRUCache
+
+
+def nightly_rates(base, rules, start, nights):
+    """
+    Return the rate of each of ``nights`` nights from ``start``.
+
+    ``rules`` are ``(start_date, end_date, weekdays, price, multiplier)`` tuples
+    in ascending precedence; each one overrides the nights it covers.
+    """
+    rates = [base] * nights
+    end = start + timedelta(days=nights)
+    first_weekday = start.weekday()
+    for rule_start, rule_end, weekdays, price, multiplier in rules:
+        lo = (max(rule_start, start) - start).days
+        hi = (min(rule_end, end) - start).days
+        rate = price if price is not None else base * multiplier
+        for night in range(lo, hi):
+            if weekdays is None or weekdays >> (first_weekday + night) % 7 & 1:
+                rates[night] = rate
+    return rates
+
+
+class RateTable:
+    """
+    Compiled rates of one room: the running total of its nightly rates from
+    ``start``, so any stay inside the horizon is priced with two lookups.
+    Stays reaching outside it are priced night by night from the same rules.
+    """
+
+    __slots__ = ('base', 'rules', 'start', 'totals')
+
+    def __init__(self, base, rules, start, nights):
+        self.base = base
+        self.rules = rules
+        self.start = start
+        self.totals = array('d', accumulate(nightly_rates(base, rules, start, nights), initial=0.0))
+
+    def total(self, check_in, check_out):
+        first = (check_in - self.start).days
+        last = (check_out - self.start).days
+        if first >= 0 and last < len(self.totals):
+            return round(self.totals[last] - self.totals[first], 2)
+        return round(math.fsum(nightly_rates(self.base, self.rules, check_in, (check_out - check_in).days)), 2)
+
+
+class PricingEngine:
+    """
+    Prices stays from ``Room.price_per_night`` and the :class:`RateRule` rows.
+
+    Each room's rates are compiled into a :class:`RateTable` for
+    ``PRICING_HORIZON_DAYS`` from today and kept per worker (LRU, at most
+    ``PRICING_CACHE_TTL`` seconds). :meth:`invalidate` bumps the ``'pricing'``
+    generation of the response cache, so with a shared cache backend every
+    worker recompiles on its next quote.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['pricing'] = LRUCache(
+            max_entries=app.config['PRICING_CACHE_ROOMS'], ttl=app.config['PRICING_CACHE_TTL']
+        )
+
+    @staticmethod
+    def _generation():
+        from app import cache
+        return cache.generation('pricing')
+
+    def invalidate(self):
+        """Drop every compiled table (after changing room prices or rate rules)."""
+        from app import cache
+        cache.invalidate('pricing')
+
+    def tables(self, room_ids):
+        """Return ``{room_id: RateTable}`` for the existing rooms among ``room_ids``."""
+        compiled = current_app.extensions['pricing']
+        generation = self._generation()
+        tables = {}
+        missing = []
+        for room_id in set(room_ids):
+            table = compiled.get(f'{generation}:{room_id}')
+            if table is None:
+                missing.append(room_id)
+            else:
+                tables[room_id] = table
+        if missing:
+            for room_id, table in self._compile(missing).items():
+                compiled.set(f'{generation}:{room_id}', table)
+                tables[room_id] = table
+        return tables
+
+    def _compile(self, room_ids):
+        """Build the tables of ``room_ids`` with one query for prices and one for rules."""
+        from app.models import RateRule, Room, db
+
+        bases = dict(db.session.query(Room.id, Room.price_per_night).filter(Room.id.in_(room_ids)))
+        rules = db.session.query(
+            RateRule.room_id, RateRule.start_date, RateRule.end_date,
+            RateRule.weekdays, RateRule.price, RateRule.multiplier
+        ).filter(
+            (RateRule.room_id.in_(bases)) | (RateRule.room_id.is_(None))
+        ).order_by(RateRule.priority, RateRule.room_id.isnot(None), RateRule.id).all()
+
+        # Both lists stay in precedence order; merge them back per room
+        by_room = {}
+        for position, rule in enumerate(rules):
+            by_room.setdefault(rule.room_id, []).append((position, tuple(rule[1:])))
+        global_rules = by_room.pop(None, [])
+
+        start = date.today()
+        nights = current_app.config['PRICING_HORIZON_DAYS']
+        tables = {}
+        shared = {}  # rooms with the same price and no rules of their own share a table
+        for room_id, base in bases.items():
+            own = by_room.get(room_id)
+            applicable = tuple(rule for _, rule in (sorted(global_rules + own) if own else global_rules))
+            key = (base, applicable)
+            if key not in shared:
+                shared[key] = RateTable(base, applicable, start, nights)
+            tables[room_id] = shared[key]
+        return tables
+
+    def quote(self, room_id, check_in, check_out):
+        """Return the total of one stay, or None if the room does not exist."""
+        table = self.tables([room_id]).get(room_id)
+        return table.total(check_in, check_out) if table is not None else None
+
+    def quote_many(self, room_ids, stays):
+        """
+        Price every room in ``room_ids`` for every ``(check_in, check_out)`` in
+        ``stays``. Returns ``{room_id: [total, ...]}`` in the order of
+        ``stays``; rooms that do not exist are left out.
+        """
+        return {
+            room_id: [table.total(check_in, check_out) for check_in, check_out in stays]
+            for room_id, table in self.tables(room_ids).items()
+        }
@@ -0,0 +1,145 @@
+import time
+from collections import deque
+
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+from app.utils.auth_helpers import current_identity, role_required
+
+
+class SQLProfile:
+    """Statements executed while handling one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = []
+        # statement -> [executions, distinct parameter sets]
+        self.statements = {}
+
+    def record(self, statement, parameters, duration, keep):
+        self.queries += 1
+        self.db_time += duration
+        seen = self.statements.setdefault(statement, [0, set()])
+        seen[0] += 1
+        seen[1].add(repr(parameters))
+        self.slowest.append((duration, statement))
+        if len(self.slowest) > keep:
+            self.slowest.sort(reverse=True)
+            del self.slowest[keep:]
+
+    def repeated(self, threshold):
+        """Statements run ``threshold``+ times with different parameters: the N+1 pattern."""
+        return sorted(
+            ((count, statement) for statement, (count, params) in self.statements.items()
+             if count >= threshold and len(params) > 1),
+            reverse=True
+        )
+
+    def summary(self, threshold):
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db_time * 1000, 3),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "slowest": [
+                {"ms": round(duration * 1000, 3), "statement": statement}
+                for duration, statement in sorted(self.slowest, reverse=True)
+            ],
+            "n_plus_one": [
+                {"count": count, "statement": statement} for count, statement in self.repeated(threshold)
+            ],
+        }
+
+
+class SQLProfiler:
+    """
+    Per-request SQL profiling.
+
+    Engine events time every statement of a profiled request. The totals are
+    returned in a ``Server-Timing`` header, statements repeated at least
+    ``SQL_PROFILER_N_PLUS_ONE`` times with different parameters are logged as
+    likely N+1 queries, and with ``SQL_PROFILER_ENDPOINT`` the last
+    ``SQL_PROFILER_HISTORY`` profiles are served to admins on ``/debug/sql-profiles``. Every request is profiled
+    with ``SQL_PROFILER_ENABLED``; otherwise only requests sending the
+    ``SQL_PROFILER_HEADER`` header with an admin token.
+    """
+
+    def __init__(self, app=None):
+        self.history = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.history = deque(maxlen=app.config['SQL_PROFILER_HISTORY'])
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        with app.app_context():
+            engines = app.extensions['sqlalchemy'].engines
+        for engine in engines.values():
+            self.instrument(engine)
+        # An explicit flag: app.debug is usually only set later, by app.run(debug=True)
+        if app.config['SQL_PROFILER_ENDPOINT']:
+            app.add_url_rule('/debug/sql-profiles', 'sql_profiles', role_required(['admin'])(self.profiles))
+
+    def instrument(self, engine):
+        """Time the statements ``engine`` runs for profiled requests."""
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    @staticmethod
+    def _requested_by_admin():
+        if not request.headers.get(current_app.config['SQL_PROFILER_HEADER']):
+            return False
+        identity = current_identity(optional=True)
+        return identity is not None and identity['role'] == 'admin'
+
+    def _start(self):
+        if current_app.config['SQL_PROFILER_ENABLED'] or self._requested_by_admin():
+            g.sql_profile = SQLProfile()
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'sql_profile' in g:
+            context._profiler_started = time.perf_counter()
+
+    @staticmethod
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_profiler_started', None)
+        if started is None or not has_request_context():
+            return
+        profile = g.get('sql_profile')
+        if profile is not None:
+            profile.record(statement, parameters, time.perf_counter() - started,
+                           current_app.config['SQL_PROFILER_SLOWEST'])
+
+    def _finish(self, response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+
+        config = current_app.config
+        summary = profile.summary(config['SQL_PROFILER_N_PLUS_ONE'])
+        timings = [
+            f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"',
+            f'app;dur={summary["total_ms"]}',
+        ]
+        if summary["slowest"]:
+            timings.append(f'db-slowest;dur={summary["slowest"][0]["ms"]}')
+        if summary["n_plus_one"]:
+            timings.append(f'db-repeated;desc="{len(summary["n_plus_one"])} statements repeated"')
+            for repeated in summary["n_plus_one"]:
+                current_app.logger.warning(
+                    "Possible N+1 on %s %s: %d x %s",
+                    request.method, request.path, repeated["count"], repeated["statement"]
+                )
+        response.headers.add('Server-Timing', ', '.join(timings))
+
+        summary.update(method=request.method, path=request.full_path, endpoint=request.endpoint,
+                       status=response.status_code)
+        self.history.append(summary)
+        return response
+
+    def profiles(self):
+        """Recent request profiles, newest first (only served with ``SQL_PROFILER_ENDPOINT``)."""
+        return jsonify(list(reversed(self.history))), 200
@@ -0,0 +1,144 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, jsonify, request
+from werkzeug.utils import import_string
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+def _json_email():
+    data = request.get_json(silent=True)
+    email = data.get('email') if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+# How a rule's bucket is keyed: by client address or by the account email in the JSON body.
+SCOPES = {
+    'ip': lambda: request.remote_addr,
+    'email': _json_email,
+}
+
+
+class RateLimitStorage:
+    """
+    Storage interface for :class:`RateLimiter`.
+
+    The default :class:`MemoryStorage` counts per worker process, so with N
+    gunicorn workers a client effectively gets N times the limit. A store
+    shared by all workers (e.g. Redis, running the same arithmetic in a Lua
+    script) only has to implement :meth:`hit`, atomically.
+    """
+
+    def hit(self, key, limit, period):
+        """
+        Spend one request from the bucket ``key`` allowing ``limit`` per
+        ``period`` seconds. Return 0 if allowed, else the seconds to wait.
+        """
+        raise NotImplementedError
+
+
+class MemoryStorage(RateLimitStorage):
+    """
+    In-process token buckets (GCRA: one timestamp per key).
+
+    A bucket holds ``limit`` requests and refills continuously at
+    ``limit / period`` per second, which behaves like a smoothly sliding
+    window. At most ``max_keys`` buckets are kept; the least recently used are
+    dropped first (by then they are usually full again anyway).
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> theoretical arrival time
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, period):
+        interval = period / limit
+        now = time.monotonic()
+        with self._lock:
+            arrival = max(self._buckets.get(key, now), now) + interval
+            wait = arrival - period - now
+            if wait > 0:
+                return wait
+            self._buckets[key] = arrival
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0
+
+
+def default_storage(config):
+    """Build the in-process storage from the app config."""
+    return MemoryStorage(max_keys=config['RATE_LIMIT_MAX_KEYS'])
+
+
+def parse_limit(text):
+    """Parse ``'5/minute:email'`` into ``(5, 60, 'email')``; the scope defaults to ``ip``."""
+    amount, _, rest = text.partition('/')
+    period, _, scope = rest.partition(':')
+    scope = scope or 'ip'
+    if period not in PERIODS or scope not in SCOPES or int(amount) < 1:
+        raise ValueError(f'Invalid rate limit {text!r}')
+    return int(amount), PERIODS[period], scope
+
+
+def parse_target(target):
+    """Split ``'POST,PUT reservation_routes'`` into ``({'POST', 'PUT'}, 'reservation_routes')``."""
+    methods, _, name = target.rpartition(' ')
+    return (set(methods.upper().split(',')) if methods else None), name
+
+
+class RateLimiter:
+    """
+    Rejects requests over the limits in ``RATE_LIMITS`` with 429 and ``Retry-After``.
+
+    ``RATE_LIMITS`` maps an endpoint (``'users_routes.login'``) or a whole
+    blueprint (``'reservation_routes'``), optionally prefixed with the methods
+    it covers (``'POST,PUT,DELETE event_routes'``), to limits such as
+    ``'10/minute'`` (per client IP) or ``'5/minute:email'`` (per account email
+    in the JSON body). Every matching limit is checked in a ``before_request``
+    hook, ahead of authentication, password hashing and any query.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config['RATE_LIMIT_ENABLED']:
+            return
+        factory = app.config['RATE_LIMIT_STORAGE'] or default_storage
+        if isinstance(factory, str):
+            factory = import_string(factory)
+        app.extensions['rate_limit_storage'] = factory(app.config)
+
+        # name -> [(methods, limit, period, scope, bucket prefix)], per app since
+        # this limiter is shared by every app create_app() builds
+        rules = {}
+        for target, limits in app.config['RATE_LIMITS'].items():
+            methods, name = parse_target(target)
+            for text in limits:
+                limit, period, scope = parse_limit(text)
+                rules.setdefault(name, []).append((methods, limit, period, scope, f'{target}|{text}'))
+        app.extensions['ratelimit'] = rules
+        app.before_request(self._check)
+
+    def _check(self):
+        rules = current_app.extensions['ratelimit']
+        rules = rules.get(request.endpoint, []) + rules.get(request.blueprint, [])
+        if not rules:
+            return None
+        storage = current_app.extensions['rate_limit_storage']
+        for methods, limit, period, scope, prefix in rules:
+            if methods is not None and request.method not in methods:
+                continue
+            value = SCOPES[scope]()
+            if value is None:
+                continue
+            wait = storage.hit(f'{prefix}|{value}', limit, period)
+            if wait:
+                return jsonify({"message": "Too many requests, please retry later"}), 429, \
+                    {"Retry-After": str(math.ceil(wait))}
+        return None
@@ -0,0 +1,113 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import current_app, g, request
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLogger:
+    """
+    App-wide structured request log.
+
+    One JSON record per sampled request, with the route's latency, is handed to
+    a bounded in-memory queue; a background thread drains the queue to the real
+    handler, so slow stdout/pipes never block a worker. Sensitive headers are
+    redacted and bodies are only logged (truncated) when explicitly enabled.
+    """
+
+    logger_name = 'hotel.requests'
+
+    def __init__(self, app=None):
+        self.logger = None
+        self.listener = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config['REQUEST_LOG_ENABLED']:
+            return
+        if self.logger is None:
+            self._start_listener(app.config['REQUEST_LOG_QUEUE_SIZE'])
+        app.before_request(self._start_timer)
+        app.after_request(self._log_request)
+
+    def _start_listener(self, queue_size):
+        log_queue = queue.Queue(maxsize=queue_size)
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(logging.Formatter('%(message)s'))
+        self.listener = QueueListener(log_queue, output)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+        self.logger = logging.getLogger(self.logger_name)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(DroppingQueueHandler(log_queue))
+
+    def _start_timer(self):
+        g.request_started = time.perf_counter()
+
+    def _log_request(self, response):
+        config = current_app.config
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        # Errors are always logged; everything else is sampled.
+        if response.status_code < 500 and random.random() >= config['REQUEST_LOG_SAMPLE_RATE']:
+            return response
+
+        record = {
+            "ts": round(time.time(), 3),
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            "remote_addr": request.remote_addr,
+            "request_bytes": request.content_length or 0,
+            "response_bytes": response.calculate_content_length(),
+        }
+        if config['REQUEST_LOG_HEADERS']:
+            record["headers"] = self._redacted_headers(config)
+        if config['REQUEST_LOG_MAX_BODY'] and request.content_length:
+            record["body"] = self._redacted_body(config)
+
+        self.logger.info(json.dumps(record, default=str))
+        return response
+
+    def _redacted_headers(self, config):
+        redact = {name.lower() for name in config['REQUEST_LOG_REDACT_HEADERS']}
+        limit = config['REQUEST_LOG_MAX_HEADER']
+        return {
+            name: '[redacted]' if name.lower() in redact else value[:limit]
+            for name, value in request.headers.items()
+        }
+
+    def _redacted_body(self, config):
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = {
+                key: '[redacted]' if key in config['REQUEST_LOG_REDACT_FIELDS'] else value
+                for key, value in payload.items()
+            }
+            body = json.dumps(payload, default=str)
+        else:
+            body = request.get_data(as_text=True)
+        return body[:config['REQUEST_LOG_MAX_BODY']]
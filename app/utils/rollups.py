@@ -0,0 +1,75 @@
+from collections import defaultdict
+from datetime import timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models import Reservation, RoomDailyStat, db
+
+rollups_cli = AppGroup('rollups', help='Maintain the occupancy/revenue rollup table.')
+
+
+def _nightly_deltas(room_id, check_in, check_out, price, sign):
+    """Yield ((room_id, day), (occupied, revenue)) for every night of a stay."""
+    nights = (check_out - check_in).days
+    if nights <= 0:
+        return
+    nightly = (price or 0) / nights
+    for offset in range(nights):
+        yield (room_id, check_in + timedelta(days=offset)), (sign, sign * nightly)
+
+
+def _upsert(deltas):
+    """Add ``{(room_id, day): (occupied, revenue)}`` onto the rollup rows."""
+    if not deltas:
+        return
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    statement = insert(RoomDailyStat)
+    statement = statement.on_conflict_do_update(
+        index_elements=['room_id', 'day'],
+        set_={
+            'occupied': RoomDailyStat.occupied + statement.excluded.occupied,
+            'revenue': RoomDailyStat.revenue + statement.excluded.revenue
+        }
+    )
+    db.session.execute(statement, [
+        {"room_id": room_id, "day": day, "occupied": occupied, "revenue": revenue}
+        for (room_id, day), (occupied, revenue) in deltas.items()
+    ])
+
+
+def record_stay(room_id, check_in, check_out, price, sign=1):
+    """
+    Add (``sign=1``) or remove (``sign=-1``) one reservation from the rollups.
+
+    Runs inside the caller's transaction, so the rollups commit or roll back
+    together with the reservation change.
+    """
+    _upsert(dict(_nightly_deltas(room_id, check_in, check_out, price, sign)))
+
+
+@rollups_cli.command('rebuild')
+@click.option('--batch-size', default=5000, show_default=True, help='Reservations aggregated per round trip.')
+def rebuild(batch_size):
+    """Recompute the rollup table from the full reservation history."""
+    db.session.query(RoomDailyStat).delete()
+    result = db.session.execute(
+        db.select(Reservation.room_id, Reservation.check_in, Reservation.check_out, Reservation.price)
+        .order_by(Reservation.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    processed = 0
+    for batch in result.partitions():
+        # Aggregate the whole batch in memory, then write it with one executemany.
+        totals = defaultdict(lambda: [0, 0.0])
+        for room_id, check_in, check_out, price in batch:
+            for key, (occupied, revenue) in _nightly_deltas(room_id, check_in, check_out, price, 1):
+                totals[key][0] += occupied
+                totals[key][1] += revenue
+        _upsert(totals)
+        processed += len(batch)
+    db.session.commit()
+    click.echo(f"Rebuilt rollups from {processed} reservations.")
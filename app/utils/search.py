@@ -0,0 +1,172 @@
+import re
+
+import click
+from flask import current_app, jsonify, request
+from flask.cli import AppGroup
+from sqlalchemy import DDL, Float, Integer, String, event, text
+
+from app.models import Event, Room, db
+
+search_cli = AppGroup('search', help='Maintain the full-text search indexes.')
+
+TERM = re.compile(r'\w+\*?')
+MAX_TERMS = 10
+HIGHLIGHT = ('<mark>', '</mark>')
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index over text columns of ``model``.
+
+    ``<table>_fts`` is an external-content FTS5 table: it stores only the
+    inverted index and reads snippets from the base table. Triggers keep it in
+    sync on every insert, delete and update of the indexed columns, whatever
+    writes the row (ORM, bulk executemany, raw SQL), inside the same
+    transaction. Index and triggers are created with the base table;
+    ``flask search rebuild`` adds them to an existing database.
+    """
+
+    def __init__(self, model, columns, weights):
+        self.model = model
+        self.table = model.__tablename__
+        self.name = f'{self.table}_fts'
+        self.columns = columns
+        # bm25 weight per column: matches in a title outrank the description.
+        self.weights = weights
+
+    def ddl(self):
+        name, table, columns = self.name, self.table, ', '.join(self.columns)
+        new = ', '.join(f'new.{column}' for column in self.columns)
+        old = ', '.join(f'old.{column}' for column in self.columns)
+        weights = ', '.join(str(weight) for weight in self.weights)
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({columns}, content='{table}', "
+            f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            f"INSERT INTO {name}({name}, rank) VALUES ('rank', 'bm25({weights})')",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {name}(rowid, {columns}) VALUES (new.id, {new}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {name}({name}, rowid, {columns}) VALUES ('delete', old.id, {old}); END",
+            # Only edits of indexed columns reindex (not e.g. Room.booking_version bumps).
+            f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+            f"INSERT INTO {name}({name}, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {name}(rowid, {columns}) VALUES (new.id, {new}); END",
+        ]
+
+    def install(self):
+        """Create the index and triggers whenever the base table is created (SQLite only)."""
+        table = self.model.__table__
+        for statement in self.ddl():
+            event.listen(table, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+        # Triggers go with the base table, the virtual table has to be dropped explicitly.
+        event.listen(table, 'before_drop', DDL(f'DROP TABLE IF EXISTS {self.name}').execute_if(dialect='sqlite'))
+
+    def rebuild(self):
+        """Create missing index/triggers and reindex every row of the base table."""
+        for statement in self.ddl():
+            db.session.execute(text(statement))
+        db.session.execute(text(f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')"))
+        db.session.execute(text(f"INSERT INTO {self.name}({self.name}) VALUES ('optimize')"))
+
+    def search(self, expression, columns, limit, offset):
+        """
+        Rows of ``columns`` matching the FTS5 ``expression``, best first, each
+        followed by its highlighted snippet and bm25 rank.
+
+        Ranking and LIMIT run inside FTS5 before the join, so only one page of
+        base rows is read. bm25 costs a few microseconds per match, so a broad
+        term over 100k documents takes tens of milliseconds. Deployments can
+        set ``SEARCH_MAX_CANDIDATES`` to rank only that many of the newest
+        matches (a cheap walk of the index in rowid order); the second return
+        value then tells whether older matches were left out.
+        """
+        params = {"expression": expression}
+        window = ''
+        truncated = False
+        candidates = current_app.config['SEARCH_MAX_CANDIDATES']
+        if candidates:
+            # The candidate floor, plus the next older match if there is one
+            edge = db.session.execute(text(
+                f"SELECT rowid FROM {self.name} WHERE {self.name} MATCH :expression "
+                f"ORDER BY rowid DESC LIMIT 2 OFFSET :skip"
+            ), dict(params, skip=candidates - 1)).scalars().all()
+            if len(edge) == 2:
+                window, params["floor"], truncated = 'AND rowid >= :floor ', edge[0], True
+
+        hits = text(
+            f"SELECT rowid AS id, snippet({self.name}, -1, :open, :close, '…', :tokens) AS snippet, "
+            f"rank FROM {self.name} WHERE {self.name} MATCH :expression {window}"
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        ).columns(id=Integer, snippet=String, rank=Float).subquery('hits')
+        statement = (
+            db.select(*columns, hits.c.snippet, hits.c.rank)
+            .join(hits, self.model.id == hits.c.id)
+            .order_by(hits.c.rank)
+        )
+        params.update(limit=limit, offset=offset, open=HIGHLIGHT[0], close=HIGHLIGHT[1],
+                      tokens=current_app.config['SEARCH_SNIPPET_TOKENS'])
+        return db.session.execute(statement, params).all(), truncated
+
+
+room_index = SearchIndex(Room, ('name', 'description'), (10.0, 1.0))
+event_index = SearchIndex(Event, ('title', 'description', 'location'), (10.0, 1.0, 5.0))
+INDEXES = (room_index, event_index)
+for _index in INDEXES:
+    _index.install()
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query in which every word must match; a
+    trailing ``*`` makes a word a prefix (``sea vi*`` finds "sea view").
+    Operators and quotes are dropped, so user input can never be a malformed
+    FTS5 query.
+    """
+    terms = TERM.findall(query or '')[:MAX_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term[:-1]}"*' if term.endswith('*') else f'"{term}"' for term in terms)
+
+
+def search_response(index, serializer):
+    """
+    Serve ``?q=&limit=&offset=`` over ``index`` as ``{"items": [...],
+    "next_offset": ..., "truncated": ...}``; ``truncated`` is true when
+    ``SEARCH_MAX_CANDIDATES`` left older matches unranked.
+    """
+    expression = match_expression(request.args.get('q'))
+    if expression is None:
+        return jsonify({"message": "Missing search query"}), 400
+    try:
+        limit = int(request.args.get('limit', current_app.config['SEARCH_PAGE_SIZE']))
+        offset = int(request.args.get('offset', 0))
+        if limit < 1 or offset < 0:
+            raise ValueError(limit)
+    except ValueError:
+        return jsonify({"message": "Invalid pagination parameters"}), 400
+    limit = min(limit, current_app.config['PAGE_SIZE_MAX'])
+    if db.session.get_bind().dialect.name != 'sqlite':
+        return jsonify({"message": "Search requires SQLite FTS5"}), 501
+
+    fields = serializer.requested()
+    # Fetch one extra row to learn whether another page exists.
+    rows, truncated = index.search(expression, [serializer.columns[name] for name in fields], limit + 1, offset)
+    serialize = serializer.row_serializer(fields)
+    items = [
+        dict(serialize(row[:-2]), snippet=row.snippet, score=round(-row.rank, 4))
+        for row in rows[:limit]
+    ]
+    return jsonify({
+        "items": items,
+        "next_offset": offset + limit if len(rows) > limit else None,
+        "truncated": truncated
+    }), 200
+
+
+@search_cli.command('rebuild')
+def rebuild():
+    """Create the search indexes if missing and reindex all rooms and events."""
+    for index in INDEXES:
+        index.rebuild()
+    db.session.commit()
+    click.echo(f"Rebuilt {', '.join(index.name for index in INDEXES)}.")
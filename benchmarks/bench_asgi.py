@@ -0,0 +1,112 @@
+"""
+WSGI vs ASGI serving benchmark.
+
+Seeds a database, starts the app under gunicorn with sync workers
+(``wsgi:app``) and then with uvicorn workers (``asgi:app``), and drives both
+with the same number of concurrent keep-alive connections issuing catalog
+reads:
+
+    python benchmarks/bench_asgi.py --connections 1000 --duration 15
+
+Both runs use gunicorn as the process manager with ``--workers`` processes, so
+only the worker model differs.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from common import gunicorn, make_app, percentile, temp_database
+
+PATHS = ('/api/rooms/?limit=20', '/api/rooms/{id}', '/api/events/?limit=20')
+
+
+def seed(database_path, rooms, events):
+    from datetime import date, time as time_of_day
+
+    from app import db
+    from app.models import Event, Room
+
+    app = make_app(database_path)
+    with app.app_context():
+        db.session.add_all(
+            Room(name=f'Room {i}', description='Benchmark room', square_meters=20, price_per_night=100)
+            for i in range(rooms)
+        )
+        db.session.add_all(
+            Event(title=f'Event {i}', description='Benchmark event', date=date(2030, 1, 1 + i % 28),
+                  time=time_of_day(18, 0), location='Lobby')
+            for i in range(events)
+        )
+        db.session.commit()
+
+
+async def client(port, rooms, deadline, latencies, errors):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            path = random.choice(PATHS).format(id=random.randint(1, rooms))
+            started = time.perf_counter()
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n'.encode())
+            await writer.drain()
+            head = (await reader.readuntil(b'\r\n\r\n')).lower()
+            status = int(head.split(b' ', 2)[1])
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line.startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+            # Sync gunicorn workers do not keep connections alive.
+            if b'connection: close' in head:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors.append('disconnect')
+            if writer is not None:
+                writer.close()
+                writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, connections, duration, rooms):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(client(port, rooms, deadline, latencies, errors) for _ in range(connections)))
+    return latencies, errors
+
+
+def run(name, database_path, args, target, extra_args=()):
+    with gunicorn(database_path, target, args.workers, extra_args) as port:
+        started = time.perf_counter()
+        latencies, errors = asyncio.run(load(port, args.connections, args.duration, args.rooms))
+        elapsed = time.perf_counter() - started
+
+    print(f'{name}: {len(latencies) / elapsed:8.0f} req/s  '
+          f'p50 {percentile(latencies, 50) * 1000:7.1f} ms  '
+          f'p99 {percentile(latencies, 99) * 1000:7.1f} ms  '
+          f'errors {len(errors)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--rooms', type=int, default=500)
+    parser.add_argument('--events', type=int, default=200)
+    args = parser.parse_args()
+
+    database_path = temp_database()
+    seed(database_path, args.rooms, args.events)
+    run('sync    (wsgi:app)', database_path, args, 'wsgi:app')
+    run('uvicorn (asgi:app)', database_path, args, 'asgi:app', ('-k', 'uvicorn.workers.UvicornWorker'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Protected-route overhead benchmark.
+
+Measures the per-request cost of authentication by comparing the same trivial
+view served unprotected, behind the previous ``role_required`` (full JWT
+verification plus ``json.loads`` of the identity, with ``@jwt_required()``
+stacked on top as some routes had it) and behind the current single-pass
+``role_required``, both with one reused token (verified-token cache hits) and
+with a fresh token per request (cache misses):
+
+    python benchmarks/bench_auth.py --requests 20000
+"""
+import argparse
+import json
+import time
+from functools import wraps
+
+from flask import jsonify
+from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
+
+from common import make_app, percentile
+
+
+def legacy_role_required(allowed_roles):
+    """role_required as it was: jwt_required() and a JSON identity string."""
+    def decorator(func):
+        @wraps(func)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            user = json.loads(get_jwt_identity())
+            if user["role"] not in allowed_roles:
+                return jsonify({"message": "Access forbidden: insufficient role"}), 403
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def build_app():
+    from app.utils.auth_helpers import role_required
+
+    app = make_app()
+
+    def view():
+        return jsonify({"ok": True}), 200
+
+    app.add_url_rule('/bench/public', 'public', view)
+    app.add_url_rule('/bench/legacy', 'legacy', jwt_required()(legacy_role_required(['admin'])(view)))
+    app.add_url_rule('/bench/current', 'current', role_required(['admin'])(view))
+    return app
+
+
+def tokens(app, count, legacy):
+    with app.app_context():
+        if legacy:
+            return [create_access_token(identity=json.dumps({"id": 1, "role": "admin"})) for _ in range(count)]
+        return [create_access_token(identity='1', additional_claims={"role": "admin"}) for _ in range(count)]
+
+
+def run(client, path, headers):
+    latencies = []
+    for header in headers:
+        started = time.perf_counter()
+        response = client.get(path, headers=header)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    app = build_app()
+    client = app.test_client()
+    n = args.requests
+
+    def bearer(token_list):
+        return [{"Authorization": f"Bearer {token}"} for token in token_list]
+
+    legacy_token = tokens(app, 1, legacy=True)
+    current_token = tokens(app, 1, legacy=False)
+    scenarios = [
+        ('public (no auth)', '/bench/public', [{}] * n),
+        ('before: jwt_required + json identity', '/bench/legacy', bearer(legacy_token * n)),
+        ('after: one token, cache hits', '/bench/current', bearer(current_token * n)),
+        ('after: new token per request', '/bench/current', bearer(tokens(app, n, legacy=False))),
+    ]
+
+    run(client, '/bench/public', [{}] * 200)  # warm up
+    baseline = None
+    print(f"{'scenario':<40} {'mean us':>9} {'p50 us':>9} {'p99 us':>9} {'auth us':>9}")
+    for name, path, headers in scenarios:
+        latencies = run(client, path, headers)
+        mean = sum(latencies) / len(latencies) * 1e6
+        if baseline is None:
+            baseline = mean
+        print(f"{name:<40} {mean:>9.1f} {percentile(latencies, 50) * 1e6:>9.1f} "
+              f"{percentile(latencies, 99) * 1e6:>9.1f} {mean - baseline:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Concurrency check for reservation creation.
+
+Fires parallel POST /api/reservations/create calls at a single room (every
+request competes for the same dates) and at distinct rooms (no contention),
+verifies that no room ends up double-booked and reports throughput.
+
+    python benchmarks/bench_booking.py --threads 16 --requests 400
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from datetime import date, timedelta
+
+from common import make_app
+
+
+def seed(app, rooms):
+    from app import db
+    from app.models import Room, User
+
+    with app.app_context():
+        customer = User(name='Bench', email='bench@example.com', phone_number='0', type='customer')
+        customer.set_password('bench')
+        db.session.add(customer)
+        db.session.add_all([
+            Room(name=f'Room {i}', description='Benchmark room', square_meters=20, price_per_night=100)
+            for i in range(rooms)
+        ])
+        db.session.commit()
+        return customer.id
+
+
+def run(app, payloads, threads):
+    def book(payload):
+        with app.test_client() as client:
+            return client.post('/api/reservations/create', json=payload).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        statuses = Counter(pool.map(book, payloads))
+    return statuses, time.perf_counter() - started
+
+
+def check_no_overlaps(app):
+    from app import db
+    from app.models import Reservation
+
+    with app.app_context():
+        other = db.aliased(Reservation)
+        clashes = db.session.query(Reservation.id).join(
+            other, db.and_(other.room_id == Reservation.room_id, other.id != Reservation.id)
+        ).filter(other.check_in < Reservation.check_out, other.check_out > Reservation.check_in).count()
+    return clashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=400)
+    args = parser.parse_args()
+
+    start = date(2030, 1, 1)
+    scenarios = {
+        # Everyone wants the same room for overlapping stays.
+        'same room': lambda i, cid: {
+            "room_id": 1, "customer_id": cid, "nights": 2, "price": 200,
+            "check_in": str(start + timedelta(days=i % 3)),
+            "check_out": str(start + timedelta(days=i % 3 + 2)),
+        },
+        # One booking per room: contention only on the database itself.
+        'different rooms': lambda i, cid: {
+            "room_id": i + 1, "customer_id": cid, "nights": 2, "price": 200,
+            "check_in": str(start), "check_out": str(start + timedelta(days=2)),
+        },
+    }
+
+    for name, make_payload in scenarios.items():
+        app = make_app()
+        customer_id = seed(app, rooms=args.requests)
+        payloads = [make_payload(i, customer_id) for i in range(args.requests)]
+        statuses, elapsed = run(app, payloads, args.threads)
+        clashes = check_no_overlaps(app)
+        print(f"{name:>16}: {args.requests / elapsed:8.1f} req/s  statuses={dict(statuses)}  "
+              f"overlapping reservations={clashes}")
+        if clashes:
+            raise SystemExit(f"double booking detected in '{name}' scenario")
+
+
+if __name__ == '__main__':
+    main()
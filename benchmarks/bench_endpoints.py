@@ -0,0 +1,358 @@
+"""
+Per-endpoint benchmark and regression gate.
+
+Seeds a dataset (see ``seed.py``), then drives every route of the API
+blueprints, either in-process through the Flask test client or over HTTP
+against a local gunicorn, and reports throughput and p50/p95/p99 latency per
+endpoint:
+
+    python benchmarks/bench_endpoints.py --scale 100k --output baseline.json
+    python benchmarks/bench_endpoints.py --scale 100k --baseline baseline.json
+
+With ``--baseline`` the run exits with status 1 if any endpoint's p95 grew, or
+its throughput dropped, by more than ``--tolerance`` (a fraction). Baselines
+are only comparable when taken on the same machine, scale and mode.
+``--database`` reuses a database seeded earlier instead of seeding again; the
+write endpoints add rows on every run, so seed afresh for a baseline you mean
+to compare against.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as time_of_day, timedelta
+
+from common import auth_header, gunicorn, make_app, percentile, temp_database
+from seed import ACCOUNTS, PASSWORD, START, dataset_sizes, parse_scale, seed
+
+# Latency percentiles reported per endpoint, in milliseconds.
+PERCENTILES = (50, 95, 99)
+
+
+def spread(i, count):
+    """Map request number ``i`` onto ids 1..count without hitting them in order."""
+    return 1 + (i * 7919) % count
+
+
+def make_rows(app, model, count, **values):
+    """Insert ``count`` throwaway rows (for the DELETE endpoints) and return their ids."""
+    from app import db
+    from app.utils.rollups import record_stay
+
+    with app.app_context():
+        rows = [model(**values) for _ in range(count)]
+        db.session.add_all(rows)
+        db.session.flush()
+        if model.__name__ == 'Reservation':
+            for row in rows:
+                record_stay(row.room_id, row.check_in, row.check_out, row.price)
+        db.session.commit()
+        return [row.id for row in rows]
+
+
+def endpoints(app, sizes, accounts, requests):
+    """
+    Describe each endpoint as ``(name, method, path(i), body(i), headers)``.
+
+    Request ``i`` of an endpoint calls ``path(i)``/``body(i)`` (and
+    ``headers(i)`` when headers are callable), so writes use fresh data and
+    DELETEs consume rows prepared for them. Reads come first so they see the
+    seeded dataset.
+    """
+    from app import db
+    from app.models import Event, RateRule, Reservation, Room, Task
+
+    admin = auth_header(app, accounts['admin'], 'admin')
+    staff = auth_header(app, accounts['staff'], 'staff')
+    customer = auth_header(app, accounts['customer'], 'customer')
+    rooms, tasks, events = sizes['rooms'], sizes['tasks'], sizes['events']
+    run = int(time.time())  # keeps unique fields unique across runs on one database
+    last_night = START + timedelta(days=3 * (sizes['reservations'] // rooms + 1))
+    far = date(2100, 1, 1)
+
+    def room(i):
+        return {"name": f"Bench room {i}", "description": "Created by the benchmark",
+                "square_meters": 20, "price_per_night": 100}
+
+    def event(i):
+        return {"title": f"Bench event {i}", "description": "Created by the benchmark",
+                "date": str(START), "time": "18:00:00", "location": "Lobby"}
+
+    def task(i):
+        return {"title": f"Bench task {i}", "description": "Created by the benchmark",
+                "due_date": f"{START} 12:00:00", "user_assigned": accounts['staff']}
+
+    def user(prefix, i):
+        return {"name": "Bench", "email": f"{prefix}-{run}-{i}@bench.example",
+                "phone_number": f"+3{run % 100000:05d}{i:06d}", "password": PASSWORD}
+
+    reads = [
+        ('GET /api/rooms/', 'GET', lambda i: '/api/rooms/?limit=50', None, {}),
+        ('GET /api/rooms/available', 'GET',
+         lambda i: f'/api/rooms/available?check_in={last_night}&check_out={last_night + timedelta(days=2)}',
+         None, {}),
+        ('GET /api/rooms/<id>', 'GET', lambda i: f'/api/rooms/{spread(i, rooms)}', None, {}),
+        ('GET /api/rooms/search', 'GET', lambda i: f'/api/rooms/search?q=room%20{spread(i, rooms)}', None, {}),
+        ('POST /api/rooms/quote', 'POST', lambda i: '/api/rooms/quote',
+         lambda i: {"room_ids": [spread(i + n, rooms) for n in range(20)],
+                    "stays": [{"check_in": str(START + timedelta(days=7 * n)),
+                               "check_out": str(START + timedelta(days=7 * n + 3))} for n in range(5)]}, {}),
+        ('GET /api/rooms/rate-rules', 'GET', lambda i: '/api/rooms/rate-rules?limit=50', None, admin),
+        ('GET /api/events/', 'GET', lambda i: '/api/events/?limit=50', None, {}),
+        ('GET /api/events/<id>', 'GET', lambda i: f'/api/events/{spread(i, events)}', None, {}),
+        ('GET /api/events/search', 'GET', lambda i: f'/api/events/search?q=event%20{spread(i, events)}', None, {}),
+        ('GET /api/events/calendar.ics', 'GET',
+         lambda i: f'/api/events/calendar.ics?from={START}&to={START + timedelta(days=30)}', None, {}),
+        ('GET /api/tasks/', 'GET', lambda i: '/api/tasks/?limit=50', None, staff),
+        ('GET /api/tasks/mine', 'GET', lambda i: '/api/tasks/mine?limit=50', None, staff),
+        ('GET /api/tasks/<id>', 'GET', lambda i: f'/api/tasks/{spread(i, tasks)}', None, staff),
+        ('GET /api/reservations/', 'GET', lambda i: '/api/reservations/?limit=50', None, {}),
+        ('GET /api/reservations/<id>', 'GET',
+         lambda i: f'/api/reservations/{spread(i, sizes["reservations"])}', None, admin),
+        ('GET /api/reservations/my-reservations', 'GET', lambda i: '/api/reservations/my-reservations',
+         None, customer),
+        ('GET /api/users/', 'GET', lambda i: '/api/users/?limit=50', None, admin),
+        ('GET /api/analytics/occupancy', 'GET',
+         lambda i: f'/api/analytics/occupancy?from={START}&to={START + timedelta(days=90)}', None, admin),
+        ('POST /api/users/login', 'POST', lambda i: '/api/users/login',
+         lambda i: {"email": dict(ACCOUNTS)['customer'], "password": PASSWORD}, {}),
+    ]
+
+    doomed = {
+        'rooms': make_rows(app, Room, requests, **room(0)),
+        'events': make_rows(app, Event, requests, title='Doomed', description='-', date=START,
+                            time=time_of_day(12), location='-'),
+        'tasks': make_rows(app, Task, requests, title='Doomed', description='-', status='pending',
+                           due_date=datetime(2030, 1, 1)),
+        'reservations': make_rows(app, Reservation, requests, room_id=1, customer_id=accounts['customer'],
+                                  nights=1, check_in=far, check_out=far + timedelta(days=1), price=1.0),
+        'rate_rules': make_rows(app, RateRule, requests, name='Doomed', start_date=far,
+                                end_date=far + timedelta(days=1), multiplier=1.0, priority=0),
+    }
+    # Logout revokes the token it is sent with, so every request gets its own.
+    sessions = [auth_header(app, accounts['customer'], 'customer') for _ in range(requests)]
+    with app.app_context():
+        booked_until = db.session.query(db.func.max(Reservation.check_out)).scalar()
+
+    def stay(i):
+        # Dates after every existing booking, spread over all rooms.
+        check_in = booked_until + timedelta(days=1 + 3 * (i // rooms))
+        return {"room_id": spread(i, rooms), "check_in": str(check_in), "check_out": str(check_in + timedelta(days=2))}
+
+    writes = [
+        ('POST /api/users/register', 'POST', lambda i: '/api/users/register', lambda i: user('guest', i), {}),
+        ('POST /api/users/create-staff', 'POST', lambda i: '/api/users/create-staff',
+         lambda i: user('staff', i), admin),
+        ('POST /api/users/logout', 'POST', lambda i: '/api/users/logout', None, lambda i: sessions[i]),
+        ('POST /api/rooms/create', 'POST', lambda i: '/api/rooms/create', room, admin),
+        ('POST /api/rooms/bulk', 'POST', lambda i: '/api/rooms/bulk', lambda i: [room(i)] * 20, admin),
+        ('PUT /api/rooms/bulk', 'PUT', lambda i: '/api/rooms/bulk',
+         lambda i: [{"id": spread(i + n, rooms), "price_per_night": 100 + n} for n in range(20)], admin),
+        ('PUT /api/rooms/<id>', 'PUT', lambda i: f'/api/rooms/{spread(i, rooms)}',
+         lambda i: {"price_per_night": 100 + i % 50}, admin),
+        ('DELETE /api/rooms/<id>', 'DELETE', lambda i: f'/api/rooms/{doomed["rooms"][i]}', None, admin),
+        ('POST /api/rooms/rate-rules', 'POST', lambda i: '/api/rooms/rate-rules',
+         lambda i: {"name": f"Bench season {i}", "start_date": str(far), "end_date": str(far + timedelta(days=7)),
+                    "multiplier": 1.1}, admin),
+        ('DELETE /api/rooms/rate-rules/<id>', 'DELETE',
+         lambda i: f'/api/rooms/rate-rules/{doomed["rate_rules"][i]}', None, admin),
+        ('POST /api/events/create', 'POST', lambda i: '/api/events/create', event, admin),
+        ('POST /api/events/bulk', 'POST', lambda i: '/api/events/bulk', lambda i: [event(i)] * 20, admin),
+        ('PUT /api/events/bulk', 'PUT', lambda i: '/api/events/bulk',
+         lambda i: [{"id": spread(i + n, events), "location": f"Hall {n}"} for n in range(20)], admin),
+        ('PUT /api/events/<id>', 'PUT', lambda i: f'/api/events/{spread(i, events)}',
+         lambda i: {"location": f"Hall {i % 5}"}, admin),
+        ('DELETE /api/events/<id>', 'DELETE', lambda i: f'/api/events/{doomed["events"][i]}', None, admin),
+        ('POST /api/tasks/create', 'POST', lambda i: '/api/tasks/create', task, admin),
+        ('POST /api/tasks/bulk', 'POST', lambda i: '/api/tasks/bulk', lambda i: [task(i)] * 20, admin),
+        ('PUT /api/tasks/bulk', 'PUT', lambda i: '/api/tasks/bulk',
+         lambda i: [{"id": spread(i + n, tasks), "status": "in_progress"} for n in range(20)], admin),
+        ('PUT /api/tasks/<id>', 'PUT', lambda i: f'/api/tasks/{spread(i, tasks)}',
+         lambda i: {"status": "completed"}, staff),
+        ('DELETE /api/tasks/<id>', 'DELETE', lambda i: f'/api/tasks/{doomed["tasks"][i]}', None, admin),
+        ('POST /api/reservations/create', 'POST', lambda i: '/api/reservations/create',
+         lambda i: dict(stay(i), customer_id=accounts['customer'], nights=2, price=200), {}),
+        ('PUT /api/reservations/<id>', 'PUT',
+         lambda i: f'/api/reservations/{spread(i, sizes["reservations"])}', lambda i: {"price": 200.0}, admin),
+        ('DELETE /api/reservations/<id>', 'DELETE',
+         lambda i: f'/api/reservations/{doomed["reservations"][i]}', None, admin),
+    ]
+    return reads + writes
+
+
+def test_client_sender(app):
+    """Send requests in-process; one test client per thread."""
+    local = threading.local()
+
+    def send(method, path, body, headers):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return local.client.open(path, method=method, json=body, headers=headers).status_code
+    return send
+
+
+def http_sender(port):
+    """Send requests over HTTP to a local server; sync workers close every connection anyway."""
+    def send(method, path, body, headers):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        headers = dict(headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        return response.status
+    return send
+
+
+def warm_up(send, concurrency):
+    """Get workers imported, connected and caches filled before measuring."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda i: send('GET', '/api/rooms/?limit=50', None, {}), range(concurrency * 4)))
+
+
+def measure(send, endpoint, requests, concurrency):
+    """Issue ``requests`` calls to one endpoint from ``concurrency`` threads and summarize them."""
+    name, method, path, body, headers = endpoint
+
+    def call(i):
+        started = time.perf_counter()
+        status = send(method, path(i), body(i) if body else None, headers(i) if callable(headers) else headers)
+        return status, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for _, latency in samples]
+    statuses = Counter(status for status, _ in samples)
+    result = {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput": round(requests / elapsed, 2),
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}"] = round(percentile(latencies, pct) * 1000, 3)
+    return result
+
+
+def run(send, selected, args):
+    warm_up(send, args.concurrency)
+    return {endpoint[0]: measure(send, endpoint, args.requests, args.concurrency) for endpoint in selected}
+
+
+def compare(baseline, current, tolerance):
+    """Return a message for every endpoint that regressed beyond ``tolerance``."""
+    regressions = []
+    for mode, results in current.items():
+        for name, result in results.items():
+            base = baseline.get(mode, {}).get(name)
+            if base is None:
+                continue
+            if result['p95'] > base['p95'] * (1 + tolerance):
+                regressions.append(f"{mode} {name}: p95 {base['p95']:.1f} -> {result['p95']:.1f} ms")
+            if result['throughput'] < base['throughput'] * (1 - tolerance):
+                regressions.append(
+                    f"{mode} {name}: throughput {base['throughput']:.1f} -> {result['throughput']:.1f} req/s"
+                )
+            if result['errors'] > base['errors']:
+                regressions.append(f"{mode} {name}: errors {base['errors']} -> {result['errors']}")
+    return regressions
+
+
+def report(mode, results):
+    print(f"\n{mode}")
+    print(f"{'endpoint':<42} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    for name, result in results.items():
+        statuses = ' '.join(f'{status}x{count}' for status, count in result['statuses'].items())
+        print(f"{name:<42} {result['throughput']:>9.1f} {result['p50']:>9.2f} "
+              f"{result['p95']:>9.2f} {result['p99']:>9.2f}  {statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', default='1k', help='1k, 10k, 100k, 1m or a reservation count')
+    parser.add_argument('--database', help='pre-seeded SQLite file (seeded here if missing or empty)')
+    parser.add_argument('--mode', choices=('client', 'gunicorn', 'both'), default='both')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--only', help='regular expression selecting endpoint names')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    args = parser.parse_args()
+
+    reservations = parse_scale(args.scale)
+    sizes = dataset_sizes(reservations)
+    database_path = args.database or temp_database()
+    if os.path.exists(database_path) and os.path.getsize(database_path):
+        app = make_app(database_path, reset=False)
+        with app.app_context():
+            from app import db
+            from app.models import User
+            accounts = dict(db.session.execute(
+                db.select(User.type, User.id).where(User.email.in_([email for _, email in ACCOUNTS]))
+            ).all())
+    else:
+        print(f"Seeding {reservations} reservations into {database_path} ...", file=sys.stderr)
+        app = make_app(database_path)
+        accounts = seed(app, reservations)
+
+    modes = ('client', 'gunicorn') if args.mode == 'both' else (args.mode,)
+    results = {}
+    for mode in modes:
+        # Writes consume their prepared rows, so every mode gets a fresh set.
+        selected = [
+            endpoint for endpoint in endpoints(app, sizes, accounts, args.requests)
+            if not args.only or re.search(args.only, endpoint[0])
+        ]
+        if mode == 'client':
+            results[mode] = run(test_client_sender(app), selected, args)
+        else:
+            with gunicorn(database_path, workers=args.workers) as port:
+                results[mode] = run(http_sender(port), selected, args)
+        report(mode, results[mode])
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({
+                "meta": {
+                    "scale": reservations,
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "workers": args.workers,
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "timestamp": int(time.time()),
+                },
+                "results": results,
+            }, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline['meta']['scale'] != reservations:
+            print(f"warning: baseline was taken at scale {baseline['meta']['scale']}", file=sys.stderr)
+        regressions = compare(baseline['results'], results, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}.")
+
+
+if __name__ == '__main__':
+    main()
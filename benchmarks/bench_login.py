@@ -0,0 +1,105 @@
+"""
+Login storm benchmark.
+
+Serves the app from a threaded local server, hammers POST /api/users/login
+from many clients and, at the same time, measures the latency of a cheap read
+(GET /api/rooms/1). Run it once per hashing configuration to compare, e.g.
+
+    PASSWORD_HASH_WORKERS=0 python benchmarks/bench_login.py   # inline hashing
+    PASSWORD_HASH_WORKERS=2 python benchmarks/bench_login.py   # bounded executor
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+
+from werkzeug.serving import make_server
+
+from common import make_app, percentile
+
+
+def seed(app):
+    from app import db
+    from app.models import Room, User
+
+    with app.app_context():
+        user = User(name='Guest', email='guest@example.com', phone_number='0', type='customer')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.add(Room(name='Room', description='Benchmark room', square_meters=20, price_per_night=100))
+        db.session.commit()
+
+
+def check_rate_limits():
+    """Fail fast if building the app more than once changes its rate limits."""
+    from config import Config
+
+    limits = {target: len(texts) for target, texts in Config.RATE_LIMITS.items()}
+    for _ in range(2):
+        rules = make_app(RATE_LIMIT_ENABLED=True).extensions['ratelimit']
+        counts = {name: len(entries) for name, entries in rules.items()}
+        assert counts == limits, f"rate limits drifted across create_app() calls: {counts} != {limits}"
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    started = time.perf_counter()
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    status = conn.getresponse().status
+    conn.close()
+    return status, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--login-clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    check_rate_limits()
+    app = make_app()
+    seed(app)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    deadline = time.monotonic() + args.duration
+    login_statuses = Counter()
+    login_latencies = []
+    read_latencies = []
+
+    def login_client():
+        while time.monotonic() < deadline:
+            status, elapsed = request(port, 'POST', '/api/users/login',
+                                      {"email": "guest@example.com", "password": "secret"})
+            login_statuses[status] += 1
+            if status == 200:
+                login_latencies.append(elapsed)
+
+    def read_client():
+        while time.monotonic() < deadline:
+            read_latencies.append(request(port, 'GET', '/api/rooms/1')[1])
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=login_client) for _ in range(args.login_clients)]
+    threads.append(threading.Thread(target=read_client))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    print(f"hash workers={app.config['PASSWORD_HASH_WORKERS']} "
+          f"executor={app.config['PASSWORD_HASH_EXECUTOR']} clients={args.login_clients}")
+    print(f"  logins: {login_statuses[200] / args.duration:.1f}/s ok, statuses={dict(login_statuses)}, "
+          f"p50={percentile(login_latencies, 50) * 1000:.1f}ms p99={percentile(login_latencies, 99) * 1000:.1f}ms")
+    print(f"  GET /api/rooms/1 during storm: n={len(read_latencies)} "
+          f"p50={percentile(read_latencies, 50) * 1000:.1f}ms p95={percentile(read_latencies, 95) * 1000:.1f}ms "
+          f"p99={percentile(read_latencies, 99) * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Full-text search latency benchmark.
+
+Seeds ``--documents`` rooms and as many events with generated text (the FTS5
+triggers index them on insert), then times /api/rooms/search and
+/api/events/search through the test client for common, rare, multi-word,
+prefix and non-matching queries:
+
+    python benchmarks/bench_search.py --documents 100000
+    python benchmarks/bench_search.py --max-candidates 500   # capped ranking
+"""
+import argparse
+import random
+import time
+from datetime import date, time as time_of_day
+
+from common import make_app, percentile
+
+WORDS = ('sea view suite spa garden pool ocean balcony king queen twin deluxe family quiet terrace '
+         'breakfast city mountain lake river forest sunset sunrise jacuzzi sauna').split()
+QUERIES = ('sea view', 'spa', 'jacuzzi sauna', 'term1234', 'sun*', 'deluxe family balcony', 'nomatch')
+
+
+def text(rng, words):
+    # Mostly rare filler terms, with a sprinkling of common hotel vocabulary.
+    return ' '.join(rng.choice(WORDS) if rng.random() < 0.2 else f'term{rng.randrange(20000)}'
+                    for _ in range(words))
+
+
+def seed(app, documents):
+    from app import db
+    from app.models import Event, Room
+
+    rng = random.Random(1)
+    started = time.perf_counter()
+    with app.app_context():
+        db.session.execute(db.insert(Room), [
+            {"name": f'{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}', "description": text(rng, 40),
+             "square_meters": 20, "price_per_night": 100, "images_list": []}
+            for i in range(documents)
+        ])
+        db.session.execute(db.insert(Event), [
+            {"title": f'{rng.choice(WORDS).title()} night {i}', "description": text(rng, 30),
+             "date": date(2030, 1, 1 + i % 28), "time": time_of_day(18, 0), "location": rng.choice(WORDS)}
+            for i in range(documents)
+        ])
+        db.session.commit()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=50, help='Requests per query.')
+    parser.add_argument('--max-candidates', type=int, default=0, help='SEARCH_MAX_CANDIDATES (0 ranks all).')
+    args = parser.parse_args()
+
+    app = make_app(SEARCH_MAX_CANDIDATES=args.max_candidates)
+    elapsed = seed(app, args.documents)
+    print(f"Indexed {args.documents} rooms and {args.documents} events in {elapsed:.1f}s")
+
+    client = app.test_client()
+    print(f"{'query':<34} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for resource in ('rooms', 'events'):
+        for query in QUERIES:
+            latencies = []
+            for i in range(args.requests):
+                # The extra argument gives every request its own response cache key.
+                started = time.perf_counter()
+                response = client.get(f'/api/{resource}/search?q={query}&run={i}')
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.get_data(as_text=True)
+            hits = len(response.json['items'])
+            print(f"{resource + ' ' + repr(query):<34} {hits:>5} {percentile(latencies, 50) * 1000:>8.2f} "
+                  f"{percentile(latencies, 95) * 1000:>8.2f} {max(latencies) * 1000:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Serialization throughput per model.
+
+Seeds ``--rows`` rows of every model and, for each one, times
+  * orm:   full ORM hydration + a hand-written dict per instance (the old path)
+  * tuple: Serializer projection + dicts built from result tuples
+and the JSON encoding of the tuple output with the stdlib and the app's
+configured provider (orjson when installed).
+
+    python benchmarks/bench_serializers.py --rows 20000
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, time as time_of_day, timedelta
+
+from common import make_app
+
+
+def seed(app, rows):
+    from app import db
+    from app.models import Event, Reservation, Room, Task, User
+
+    with app.app_context():
+        db.session.execute(db.insert(User), [
+            {"name": f"User {i}", "email": f"user{i}@example.com", "phone_number": str(i),
+             "password_hash": "x", "type": "customer"} for i in range(rows)
+        ])
+        db.session.execute(db.insert(Room), [
+            {"name": f"Room {i}", "description": "Sea view " * 20, "square_meters": 20.0 + i % 30,
+             "price_per_night": 80.0 + i % 200, "images_list": [f"/img/{i}.jpg"]} for i in range(rows)
+        ])
+        db.session.execute(db.insert(Task), [
+            {"title": f"Task {i}", "description": "Clean room", "status": "pending",
+             "due_date": datetime(2030, 1, 1) + timedelta(minutes=i), "user_assigned": i % rows + 1}
+            for i in range(rows)
+        ])
+        db.session.execute(db.insert(Event), [
+            {"title": f"Event {i}", "description": "Live music", "date": date(2030, 1, 1) + timedelta(days=i % 365),
+             "time": time_of_day(20, 0), "location": "Lobby", "image": None} for i in range(rows)
+        ])
+        db.session.execute(db.insert(Reservation), [
+            {"room_id": i % rows + 1, "customer_id": i % rows + 1, "nights": 2, "price": 200.0,
+             "check_in": date(2030, 1, 1) + timedelta(days=i), "check_out": date(2030, 1, 3) + timedelta(days=i)}
+            for i in range(rows)
+        ])
+        db.session.commit()
+
+
+def orm_dict(obj, fields):
+    return {name: getattr(obj, name) for name in fields}
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    app = make_app()
+    seed(app, args.rows)
+
+    from app import db
+    from app import serializers
+
+    cases = {
+        'User': serializers.user_serializer,
+        'Room': serializers.room_serializer,
+        'Task': serializers.task_serializer,
+        'Event': serializers.event_serializer,
+        'Reservation': serializers.reservation_serializer,
+    }
+    print(f"{'model':>12} {'orm rows/s':>12} {'tuple rows/s':>13} {'stdlib json MB/s':>17} {'app json MB/s':>14}")
+    with app.app_context():
+        for name, serializer in cases.items():
+            query = serializer.model.query.order_by(serializer.model.id)
+            fields = serializer.fields
+
+            db.session.expunge_all()
+            _, orm_elapsed = timed(lambda: [orm_dict(obj, fields) for obj in query.all()])
+            db.session.expunge_all()
+            serialize = serializer.row_serializer(fields)
+            rows, tuple_elapsed = timed(lambda: [serialize(row) for row in serializer.select(query, fields).all()])
+
+            encoded, stdlib_elapsed = timed(lambda: json.dumps(rows, separators=(',', ':')))
+            _, app_elapsed = timed(lambda: app.json.dumps(rows))
+            megabytes = len(encoded) / 1e6
+            print(f"{name:>12} {args.rows / orm_elapsed:12.0f} {args.rows / tuple_elapsed:13.0f} "
+                  f"{megabytes / stdlib_elapsed:17.1f} {megabytes / app_elapsed:14.1f}")
+
+
+if __name__ == '__main__':
+    main()
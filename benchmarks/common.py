@@ -0,0 +1,105 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def temp_database():
+    """Return the path of a fresh, empty SQLite file."""
+    fd, database_path = tempfile.mkstemp(suffix='.db', prefix='hotel-bench-')
+    os.close(fd)
+    return database_path
+
+
+def make_app(database_path=None, reset=True, **overrides):
+    """
+    Build the real application against a throwaway SQLite file.
+
+    ``overrides`` are applied on top of ``Config`` before the extensions are
+    initialized, so engine and extension settings can be changed too. With
+    ``reset=False`` an existing (e.g. pre-seeded) database is used as is.
+    """
+    from app import create_app, db
+    from config import Config
+
+    database_path = database_path or temp_database()
+    settings = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}', 'REQUEST_LOG_ENABLED': False,
+                'RATE_LIMIT_ENABLED': False}
+    settings.update(overrides)
+    config_object = type('BenchConfig', (Config,), settings)
+
+    app = create_app(config_object)
+    if not reset:
+        return app
+    with app.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+    return app
+
+
+def auth_header(app, user_id, role):
+    """Mint a bearer token for ``user_id`` without going through /login."""
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity=str(user_id), additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def free_port():
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30.0):
+    """Block until something accepts connections on ``port``."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+@contextmanager
+def gunicorn(database_path, target='wsgi:app', workers=2, extra_args=(), **env):
+    """
+    Run ``target`` under a local gunicorn against ``database_path``.
+
+    Yields the port. ``env`` entries are passed to the server as environment
+    variables, so they override the matching ``Config`` settings.
+    """
+    port = free_port()
+    server_env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f'sqlite:///{database_path}', REQUEST_LOG_ENABLED='false',
+                      RATE_LIMIT_ENABLED='false')
+    server_env.update({name: str(value) for name, value in env.items()})
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', *extra_args, target],
+        cwd=ROOT, env=server_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(port)
+        yield port
+    finally:
+        server.terminate()
+        server.wait()
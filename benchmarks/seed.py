@@ -0,0 +1,132 @@
+"""
+Seed a database with a synthetic dataset for benchmarking.
+
+The size of every table is derived from the number of reservations, so one
+``--scale`` knob gives a consistent dataset:
+
+    python benchmarks/seed.py --scale 100k --database /tmp/hotel-100k.db
+
+Rows are written with batched ``executemany`` inserts and every user shares a
+single password hash, so even the ``1m`` scale seeds in minutes. The daily
+rollups are rebuilt at the end with ``flask rollups rebuild``.
+"""
+import argparse
+from datetime import date, datetime, time, timedelta
+
+from common import make_app
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+PASSWORD = 'bench'
+# Well-known accounts the benchmarks authenticate as.
+ACCOUNTS = (
+    ('admin', 'admin@bench.example'),
+    ('staff', 'staff@bench.example'),
+    ('customer', 'customer@bench.example'),
+)
+BATCH_SIZE = 10_000
+START = date(2030, 1, 1)
+
+
+def parse_scale(value):
+    """Accept a named scale (``100k``) or a plain reservation count."""
+    return SCALES[value.lower()] if value.lower() in SCALES else int(value)
+
+
+def dataset_sizes(reservations):
+    """Row counts per table for a dataset with ``reservations`` reservations."""
+    return {
+        'rooms': max(10, reservations // 100),
+        'users': max(10, reservations // 20),
+        'events': max(10, reservations // 100),
+        'tasks': max(10, reservations // 50),
+        'reservations': reservations,
+    }
+
+
+def _insert(model, rows):
+    from app import db
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(db.insert(model), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(model), batch)
+
+
+def seed(app, reservations):
+    """Fill the (empty) database of ``app``; returns the ids of the ACCOUNTS users by role."""
+    from app import db, hasher
+    from app.models import Event, Reservation, Room, Task, User
+
+    sizes = dataset_sizes(reservations)
+    with app.app_context():
+        password_hash = hasher.hash(PASSWORD)
+        _insert(User, (
+            {'name': role.capitalize(), 'email': email, 'phone_number': f'+1000000{i}',
+             'password_hash': password_hash, 'type': role}
+            for i, (role, email) in enumerate(ACCOUNTS)
+        ))
+        _insert(User, (
+            {'name': f'Guest {i}', 'email': f'guest{i}@bench.example', 'phone_number': f'+2{i:09d}',
+             'password_hash': password_hash, 'type': 'customer'}
+            for i in range(sizes['users'])
+        ))
+        _insert(Room, (
+            {'name': f'Room {i}', 'description': f'Benchmark room {i}', 'square_meters': 15 + i % 40,
+             'price_per_night': 60 + i % 200, 'booking_version': 0}
+            for i in range(sizes['rooms'])
+        ))
+        _insert(Event, (
+            {'title': f'Event {i}', 'description': f'Benchmark event {i}', 'date': START + timedelta(days=i % 365),
+             'time': time(9 + i % 12), 'location': f'Hall {i % 5}'}
+            for i in range(sizes['events'])
+        ))
+        # ACCOUNTS are inserted first, so their ids are 1..len(ACCOUNTS).
+        staff_id = [role for role, _ in ACCOUNTS].index('staff') + 1
+        first_user = len(ACCOUNTS) + 1
+        _insert(Task, (
+            {'title': f'Task {i}', 'description': f'Benchmark task {i}',
+             'due_date': datetime.combine(START + timedelta(days=i % 90), time(12)),
+             'status': ('pending', 'in_progress', 'completed')[i % 3], 'user_assigned': staff_id}
+            for i in range(sizes['tasks'])
+        ))
+        # Stays never overlap: every room gets back-to-back two-night bookings
+        # separated by one free night.
+        rooms = sizes['rooms']
+        _insert(Reservation, (
+            {'room_id': i % rooms + 1, 'customer_id': first_user + i % sizes['users'], 'nights': 2,
+             'check_in': START + timedelta(days=3 * (i // rooms)),
+             'check_out': START + timedelta(days=3 * (i // rooms) + 2), 'price': 200.0}
+            for i in range(reservations)
+        ))
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['rollups', 'rebuild', '--batch-size', str(BATCH_SIZE)])
+        if result.exit_code != 0:
+            raise RuntimeError(result.output)
+
+        accounts = db.session.execute(
+            db.select(User.type, User.id).where(User.email.in_([email for _, email in ACCOUNTS]))
+        )
+        return dict(accounts.all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', default='1k', help=f"{', '.join(SCALES)} or a reservation count")
+    parser.add_argument('--database', required=True, help='SQLite file to (re)create')
+    args = parser.parse_args()
+
+    reservations = parse_scale(args.scale)
+    seed(make_app(args.database), reservations)
+    print(f'Seeded {args.database}: ' + ', '.join(
+        f'{count} {table}' for table, count in dataset_sizes(reservations).items()
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,3 +8,163 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your_jwt_secret_key')
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///hotel.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Engine/pool tuning (pool sizing is skipped for in-memory SQLite)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+    # Optional read replica: GET/HEAD requests read from it, writes go to the
+    # primary. For local testing a second SQLite file works, ideally opened
+    # read-only, e.g. sqlite:///file:/path/replica.db?mode=ro&uri=true
+    SQLALCHEMY_REPLICA_URI = os.getenv('SQLALCHEMY_REPLICA_URI')
+
+    # Applied on every new SQLite connection. WAL lets readers run alongside
+    # the single writer instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -20000)),  # negative = KiB
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 268435456)),
+    }
+
+    # Password hashing. The method string must be fully qualified (as stored in
+    # the hash) so changed parameters can be detected and rehashed on login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_SALT_LENGTH = int(os.getenv('PASSWORD_HASH_SALT_LENGTH', 16))
+    PASSWORD_HASH_EXECUTOR = os.getenv('PASSWORD_HASH_EXECUTOR', 'thread')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv('PASSWORD_HASH_QUEUE_DEPTH', 8))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Number of reverse proxies in front of the app whose X-Forwarded-For is
+    # trusted for the client address (rate limits, idempotency scope). Leave 0
+    # when clients connect directly, or they can spoof the header.
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 0))
+
+    # Rate limits checked before any hashing or query. Keys are endpoints or
+    # blueprints, optionally prefixed with methods ('POST,PUT,DELETE
+    # reservation_routes'); values are '<n>/<second|minute|hour|day>' per client
+    # IP, or with ':email' per account email in the JSON body. The default
+    # in-process storage counts per worker; RATE_LIMIT_STORAGE is an optional
+    # import path to a factory taking the app config and returning a shared
+    # RateLimitStorage.
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE')
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))
+    RATE_LIMITS = {
+        'users_routes.login': ['20/minute', '5/minute:email'],
+        'users_routes.register': ['10/minute', '50/day'],
+    }
+
+    # Verified access tokens are cached per worker; revocations are re-read
+    # from the database at most every AUTH_REVOCATION_REFRESH seconds.
+    AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 4096))
+    AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 300))
+    AUTH_REVOCATION_REFRESH = float(os.getenv('AUTH_REVOCATION_REFRESH', 5))
+
+    # Keyset pagination for list endpoints (?limit=&after=)
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', 50))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', 500))
+
+    # Full-text search (/api/rooms/search, /api/events/search): default page
+    # size and tokens around the match in each snippet. SEARCH_MAX_CANDIDATES
+    # > 0 ranks only that many of the newest matches, bounding latency for
+    # broad terms at the cost of missing older ones (responses then carry
+    # "truncated": true); 0 ranks every match.
+    SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', 20))
+    SEARCH_SNIPPET_TOKENS = int(os.getenv('SEARCH_SNIPPET_TOKENS', 12))
+    SEARCH_MAX_CANDIDATES = int(os.getenv('SEARCH_MAX_CANDIDATES', 0))
+
+    # Largest array accepted by the /bulk endpoints
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 5000))
+
+    # Longest from/to range, in days, accepted by /api/analytics/occupancy
+    ANALYTICS_MAX_RANGE_DAYS = int(os.getenv('ANALYTICS_MAX_RANGE_DAYS', 366))
+
+    # Rows fetched per round trip when streaming exports (?stream=1)
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 1000))
+
+    # Public catalog response cache. RESPONSE_CACHE_BACKEND is an optional import
+    # path to a factory taking the app config and returning a shared CacheBackend;
+    # the default in-process LRU is only coherent within one worker, so keep the
+    # TTL short when running several.
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND')
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 30))
+
+    # Structured request log, written from a background thread
+    REQUEST_LOG_ENABLED = os.getenv('REQUEST_LOG_ENABLED', 'true').lower() == 'true'
+    REQUEST_LOG_SAMPLE_RATE = float(os.getenv('REQUEST_LOG_SAMPLE_RATE', 1.0))
+    REQUEST_LOG_QUEUE_SIZE = int(os.getenv('REQUEST_LOG_QUEUE_SIZE', 10000))
+    REQUEST_LOG_HEADERS = os.getenv('REQUEST_LOG_HEADERS', 'false').lower() == 'true'
+    REQUEST_LOG_MAX_HEADER = int(os.getenv('REQUEST_LOG_MAX_HEADER', 256))
+    REQUEST_LOG_MAX_BODY = int(os.getenv('REQUEST_LOG_MAX_BODY', 0))
+    REQUEST_LOG_REDACT_HEADERS = ['Authorization', 'Cookie', 'Set-Cookie', 'X-Api-Key']
+    REQUEST_LOG_REDACT_FIELDS = ['password']
+
+    # Prometheus metrics. Under gunicorn set METRICS_DIR to a directory shared
+    # by the workers (and emptied on deploy) so /metrics covers all of them.
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_PATH = os.getenv('METRICS_PATH', '/metrics')
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+    METRICS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+    # SQL profiler: always on, or per request for admins sending the header.
+    # Results go to a Server-Timing header, and to /debug/sql-profiles (admin
+    # tokens only) when SQL_PROFILER_ENDPOINT is set.
+    SQL_PROFILER_ENABLED = os.getenv('SQL_PROFILER_ENABLED', 'false').lower() == 'true'
+    SQL_PROFILER_ENDPOINT = os.getenv('SQL_PROFILER_ENDPOINT', 'false').lower() == 'true'
+    SQL_PROFILER_HEADER = os.getenv('SQL_PROFILER_HEADER', 'X-Profile-SQL')
+    SQL_PROFILER_SLOWEST = int(os.getenv('SQL_PROFILER_SLOWEST', 5))
+    SQL_PROFILER_N_PLUS_ONE = int(os.getenv('SQL_PROFILER_N_PLUS_ONE', 5))
+    SQL_PROFILER_HISTORY = int(os.getenv('SQL_PROFILER_HISTORY', 100))
+
+    # Idempotency-Key on the /create and /register endpoints: responses are
+    # replayed to retries for IDEMPOTENCY_TTL seconds; a duplicate arriving
+    # while the first request runs waits up to IDEMPOTENCY_WAIT_SECONDS, and a
+    # claim left by a killed worker expires after IDEMPOTENCY_LOCK_SECONDS.
+    # IDEMPOTENCY_BACKEND is an optional import path to a factory taking the
+    # app config and returning a shared CacheBackend (needs an atomic add);
+    # the default in-process LRU only covers retries reaching the same worker.
+    IDEMPOTENCY_BACKEND = os.getenv('IDEMPOTENCY_BACKEND')
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MAX_KEYS', 10000))
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 86400))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 10))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 60))
+
+    # Pricing engine: each room's nightly rates (price_per_night adjusted by
+    # RateRule rows) are compiled for PRICING_HORIZON_DAYS from today and kept
+    # per worker for PRICING_CACHE_TTL seconds. Rule and price changes bump the
+    # response cache's 'pricing' generation, so with the default in-process
+    # backend other workers pick them up within the TTL.
+    PRICING_HORIZON_DAYS = int(os.getenv('PRICING_HORIZON_DAYS', 730))
+    PRICING_CACHE_ROOMS = int(os.getenv('PRICING_CACHE_ROOMS', 4096))
+    PRICING_CACHE_TTL = int(os.getenv('PRICING_CACHE_TTL', 60))
+    # Largest rooms x stays product priced by one /api/rooms/quote request
+    PRICING_MAX_QUOTES = int(os.getenv('PRICING_MAX_QUOTES', 10000))
+
+    # Background jobs (run by worker.py). Failed jobs are retried after
+    # JOBS_BACKOFF_BASE * 2^(attempt-1) seconds (capped, with jitter); a job
+    # whose worker died is retried once its lease expires. NOTIFIER is an
+    # optional import path to a factory taking the app config and returning a
+    # Notifier; the default stub only logs.
+    JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 5))
+    JOBS_BACKOFF_BASE = float(os.getenv('JOBS_BACKOFF_BASE', 2))
+    JOBS_BACKOFF_MAX = float(os.getenv('JOBS_BACKOFF_MAX', 600))
+    JOBS_LEASE_SECONDS = int(os.getenv('JOBS_LEASE_SECONDS', 300))
+    JOBS_BATCH_SIZE = int(os.getenv('JOBS_BATCH_SIZE', 10))
+    JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', 1))
+    JOBS_RETENTION_DAYS = int(os.getenv('JOBS_RETENTION_DAYS', 7))
+    NOTIFIER = os.getenv('NOTIFIER')
+    TASK_REMINDER_LEAD_MINUTES = int(os.getenv('TASK_REMINDER_LEAD_MINUTES', 60))
+    TASK_REMINDER_INTERVAL = int(os.getenv('TASK_REMINDER_INTERVAL', 300))
+    # Oldest missed reminder window a sweep still catches up on, in seconds
+    TASK_REMINDER_MAX_CATCHUP = int(os.getenv('TASK_REMINDER_MAX_CATCHUP', 86400))
+
+    # ASGI mode (asgi:app): threads running the routes delegated to the WSGI app
+    ASGI_WSGI_WORKERS = int(os.getenv('ASGI_WSGI_WORKERS', 10))
@@ -0,0 +1,11 @@
+import signal
+
+from app import create_app, job_queue
+
+app = create_app()
+
+if __name__ == "__main__":
+    # Finish the job in progress on SIGTERM/Ctrl-C, then exit
+    signal.signal(signal.SIGTERM, lambda signum, frame: job_queue.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: job_queue.stop())
+    job_queue.work(app)